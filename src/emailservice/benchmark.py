@@ -0,0 +1,383 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Micro-benchmarks for the email service hot paths.
+#
+# usage: python benchmark.py [name ...]
+
+import logging
+import os
+import random
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from jinja2 import Environment
+
+import demo_pb2
+from outbox import Outbox
+from renderer import ConfirmationRenderer, TemplateRegistry, compile_templates
+from send_queue import OutgoingEmail, SendQueue, SendQueueConfig
+from smtp_client import SMTPConfig, SMTPMailClient
+
+LEGACY_TEMPLATE = """<!DOCTYPE html>
+<!--
+ Copyright 2020 Google LLC
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+      http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+-->
+
+<html>
+  <head>
+    <title>Your Order Confirmation</title>
+    <link href="https://fonts.googleapis.com/css2?family=DM+Sans:ital,wght@0,400;0,700;1,400;1,700&display=swap" rel="stylesheet">
+  </head>
+  <style>
+    body{
+      font-family: 'DM Sans', sans-serif;
+    }
+  </style>
+  <body>
+    <h2>Your Order Confirmation</h2>
+    <p>Thanks for shopping with us!<p>
+    <h3>Order ID</h3>
+    <p>#{{ order.order_id }}</p>
+    <h3>Shipping</h3>
+    <p>#{{ order.shipping_tracking_id }}</p>
+    <p>{{ order.shipping_cost.units }}. {{ "%02d" | format(order.shipping_cost.nanos // 10000000) }} {{ order.shipping_cost.currency_code }}</p>
+    <p>{{ order.shipping_address.street_address }}, {{order.shipping_address.city}}, {{order.shipping_address.state}}, {{order.shipping_address.country}} {{order.shipping_address.zip_code}}</p>
+    <h3>Items</h3>
+    <table style="width:100%">
+        <tr>
+          <th>Item No.</th>
+          <th>Quantity</th> 
+          <th>Price</th>
+        </tr>
+        {% for item in order.items %}
+        <tr>
+          <td>#{{ item.item.product_id }}</td>
+          <td>{{ item.item.quantity }}</td> 
+          <td>{{ item.cost.units }}.{{ "%02d" | format(item.cost.nanos // 10000000) }} {{ item.cost.currency_code }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+  </body>
+</html>"""
+
+def fake_order(num_items):
+  return demo_pb2.OrderResult(
+    order_id='a7c3f0e2-5b1d-4d2b-9c4e-0f5e6d7c8b9a',
+    shipping_tracking_id='XY-12345-678901234',
+    shipping_cost=demo_pb2.Money(currency_code='USD', units=8, nanos=990000000),
+    shipping_address=demo_pb2.Address(street_address='1600 Amphitheatre Parkway',
+                                      city='Mountain View', state='CA',
+                                      country='United States', zip_code=94043),
+    items=[demo_pb2.OrderItem(item=demo_pb2.CartItem(product_id='OLJCESPC7Z', quantity=i % 5 + 1),
+                              cost=demo_pb2.Money(currency_code='USD', units=19, nanos=990000000))
+           for i in range(num_items)])
+
+def report(name, number, seconds):
+  print("{:<40} {:>12.2f} us/call".format(name, seconds / number * 1e6))
+
+def bench_render():
+  # confirmation.html as it was before renderer.py
+  legacy = Environment(
+    autoescape=True
+  ).from_string(LEGACY_TEMPLATE)
+  with tempfile.TemporaryDirectory() as compiled_dir:
+    compile_templates(compiled_dir=compiled_dir)
+    renderer = ConfirmationRenderer(TemplateRegistry(compiled_dir=compiled_dir))
+    for num_items in (1, 10, 500):
+      order = fake_order(num_items)
+      number = max(10, 5000 // num_items)
+      report("legacy   items={}".format(num_items), number,
+             timeit.timeit(lambda: legacy.render(order=order), number=number))
+      report("renderer items={}".format(num_items), number,
+             timeit.timeit(lambda: renderer.render(order), number=number))
+      email = renderer.render(order)
+      print("         legacy html {} bytes, html {} + text {} bytes".format(
+        len(legacy.render(order=order)), len(email.html), len(email.text)))
+
+class StandInMailClient(object):
+  """Local mail client that takes `latency` seconds per call plus
+  `per_email` seconds per email, and fails a `failure_rate` share of them."""
+
+  def __init__(self, latency=0.02, per_email=0.0005, failure_rate=0.0):
+    self.latency = latency
+    self.per_email = per_email
+    self.failure_rate = failure_rate
+    self.delivered = 0
+    self._lock = threading.Lock()
+
+  def send_batch(self, emails):
+    time.sleep(self.latency + self.per_email * len(emails))
+    errors = [Exception('stand-in failure') if random.random() < self.failure_rate else None
+              for _ in emails]
+    with self._lock:
+      self.delivered += errors.count(None)
+    return errors
+
+def bench_queue():
+  logger = logging.getLogger('benchmark')
+  logger.addHandler(logging.NullHandler())
+  logger.propagate = False
+  content = ConfirmationRenderer().render(fake_order(3)).html
+  number = 2000
+  client = StandInMailClient()
+  start = time.perf_counter()
+  for _ in range(200):
+    client.send_batch([OutgoingEmail('someone@example.com', content)])
+  report("synchronous send", 200, time.perf_counter() - start)
+  with tempfile.TemporaryDirectory() as tmp:
+    for batch_size, failure_rate in ((1, 0.0), (50, 0.0), (50, 0.1)):
+      config = SendQueueConfig()
+      config.max_size = number
+      config.batch_size = batch_size
+      config.retry_backoff = 0.01
+      config.dead_letter_path = os.path.join(tmp, 'dead_letter.jsonl')
+      client = StandInMailClient(failure_rate=failure_rate)
+      send_queue = SendQueue(logger, client, config)
+      send_queue.start()
+      start = time.perf_counter()
+      for i in range(number):
+        send_queue.put(OutgoingEmail('someone@example.com', content, str(i)))
+      enqueued = time.perf_counter() - start
+      while client.delivered + send_queue.stats()['dead_lettered'] < number:
+        time.sleep(0.001)
+      drained = time.perf_counter() - start
+      send_queue.stop()
+      name = "batch_size={} failure_rate={}".format(batch_size, failure_rate)
+      report("enqueue  " + name, number, enqueued)
+      report("delivery " + name, number, drained)
+      print("         {}".format(send_queue.stats()))
+
+def bench_outbox():
+  content = ConfirmationRenderer().render(fake_order(3)).html
+  number = 2000
+  with tempfile.TemporaryDirectory() as tmp:
+    outbox = Outbox(os.path.join(tmp, 'outbox.db'))
+    emails = [OutgoingEmail('someone@example.com', content, str(i)) for i in range(number)]
+    report("add", number, timeit.timeit(lambda: outbox.add(emails.pop()), number=number))
+    report("contains", number, timeit.timeit(lambda: outbox.contains('1000'), number=number))
+    emails = outbox.pending()
+    report("mark_sent (batches of 50)", number, timeit.timeit(
+      lambda: outbox.mark_sent([emails.pop() for _ in range(50)]), number=number // 50))
+    outbox.close()
+
+def bench_smtp():
+  # needs aiosmtpd, which the service itself does not depend on
+  from aiosmtpd.controller import Controller
+
+  class CountingHandler(object):
+    received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+      self.received += 1
+      return '250 OK'
+
+  logger = logging.getLogger('benchmark')
+  logger.addHandler(logging.NullHandler())
+  logger.propagate = False
+  content = ConfirmationRenderer().render(fake_order(3)).html
+  handler = CountingHandler()
+  controller = Controller(handler, hostname='127.0.0.1', port=8025)
+  controller.start()
+  try:
+    number = 500
+    start = time.perf_counter()
+    for _ in range(number):
+      # what a client without a pool does: one connection per email
+      with smtplib.SMTP('127.0.0.1', 8025) as conn:
+        conn.sendmail('noreply@example.com', ['someone@example.com'], content)
+    report("connection per email", number, time.perf_counter() - start)
+    for workers in (1, 4):
+      config = SMTPConfig()
+      config.host, config.port, config.starttls = '127.0.0.1', 8025, False
+      config.max_connections = workers
+      queue_config = SendQueueConfig()
+      queue_config.workers = workers
+      queue_config.max_size = number
+      client = SMTPMailClient(logger, config)
+      send_queue = SendQueue(logger, client, queue_config)
+      send_queue.start()
+      received = handler.received
+      start = time.perf_counter()
+      for i in range(number):
+        send_queue.put(OutgoingEmail('someone@example.com', content, str(i)))
+      while handler.received - received < number:
+        time.sleep(0.001)
+      report("pooled, {} connections".format(workers), number, time.perf_counter() - start)
+      send_queue.stop()
+  finally:
+    controller.stop()
+
+def bench_bulk():
+  # imported here: email_server sets up the service logger and the renderer
+  import grpc
+  import demo_pb2_grpc
+  import email_server
+  from grpc_server import create_server
+
+  number = 2000
+  with tempfile.TemporaryDirectory() as tmp:
+    os.environ['EMAIL_OUTBOX_PATH'] = os.path.join(tmp, 'outbox.db')
+    os.environ['EMAIL_QUEUE_SIZE'] = str(2 * number)
+    service = email_server.create_email_service(StandInMailClient(latency=0, per_email=0))
+    server = create_server(email_server.logger)
+    demo_pb2_grpc.add_EmailServiceServicer_to_server(service, server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    with grpc.insecure_channel('127.0.0.1:{}'.format(port)) as channel:
+      stub = demo_pb2_grpc.EmailServiceStub(channel)
+      def requests(prefix):
+        for i in range(number):
+          order = fake_order(3)
+          order.order_id = '{}-{}'.format(prefix, i)
+          yield demo_pb2.SendOrderConfirmationRequest(email='someone@example.com', order=order)
+      start = time.perf_counter()
+      for request in requests('unary'):
+        stub.SendOrderConfirmation(request)
+      report("SendOrderConfirmation", number, time.perf_counter() - start)
+      start = time.perf_counter()
+      stub.SendOrderConfirmations(requests('bulk'))
+      report("SendOrderConfirmations", number, time.perf_counter() - start)
+    server.stop(0)
+    service.stop()
+
+def bench_client():
+  import asyncio
+  import grpc
+  import demo_pb2_grpc
+  import email_server
+  from email_client import AsyncEmailClient, ClientConfig, EmailClient
+  from grpc_server import create_server
+
+  server = create_server(email_server.logger)
+  service = email_server.DummyEmailService()
+  demo_pb2_grpc.add_EmailServiceServicer_to_server(service, server)
+  port = server.add_insecure_port('127.0.0.1:0')
+  server.start()
+  # the dummy service logs every request
+  email_server.logger.disabled = True
+  config = ClientConfig()
+  config.target = '127.0.0.1:{}'.format(port)
+  order = fake_order(3)
+  request = demo_pb2.SendOrderConfirmationRequest(email='someone@example.com', order=order)
+  number = 1000
+
+  def per_call_channel():
+    with grpc.insecure_channel(config.target) as channel:
+      demo_pb2_grpc.EmailServiceStub(channel).SendOrderConfirmation(request)
+  report("channel per call", number // 5, timeit.timeit(per_call_channel, number=number // 5))
+
+  client = EmailClient(config)
+  report("pooled EmailClient", number, timeit.timeit(
+    lambda: client.send_order_confirmation(request.email, order), number=number))
+  client.close()
+
+  async def run_async(concurrency):
+    client = AsyncEmailClient(config)
+    async def worker(n):
+      for _ in range(n):
+        await client.send_order_confirmation(request.email, order)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(number // concurrency) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return elapsed
+  for concurrency in (1, 10):
+    report("AsyncEmailClient, {} in flight".format(concurrency), number,
+           asyncio.run(run_async(concurrency)))
+  server.stop(0)
+  email_server.logger.disabled = False
+
+def bench_dedup():
+  # a retry storm: every order is sent three times
+  import email_server
+  from dedup import MemoryDedupStore, RedisDedupStore
+
+  class Context(object):
+    def set_code(self, code):
+      pass
+    def set_details(self, details):
+      pass
+
+  email_server.logger.disabled = True
+  number = 500
+  def requests(prefix):
+    for i in range(number):
+      order = fake_order(10)
+      order.order_id = '{}-{}'.format(prefix, i)
+      yield demo_pb2.SendOrderConfirmationRequest(email='someone@example.com', order=order)
+
+  def run(name, dedup, outbox_path):
+    os.environ['EMAIL_OUTBOX_PATH'] = outbox_path
+    os.environ['EMAIL_QUEUE_SIZE'] = str(number)
+    service = email_server.create_email_service(StandInMailClient(latency=0, per_email=0))
+    service.dedup = dedup
+    batch = list(requests(name))
+    start = time.perf_counter()
+    for _ in range(3):
+      for request in batch:
+        service.SendOrderConfirmation(request, Context())
+    report(name, 3 * number, time.perf_counter() - start)
+    service.stop()
+
+  with tempfile.TemporaryDirectory() as tmp:
+    run("no dedup, no outbox", None, '')
+    run("outbox only", None, os.path.join(tmp, 'outbox.db'))
+    run("in-process dedup", MemoryDedupStore(10000, 600), '')
+    try:
+      # needs fakeredis, which the service itself does not depend on
+      import fakeredis
+      import redis
+    except ImportError:
+      print("fakeredis not installed, skipping the redis store")
+    else:
+      server = fakeredis.TcpFakeServer(('127.0.0.1', 0))
+      threading.Thread(target=server.serve_forever, daemon=True).start()
+      client = redis.Redis(host='127.0.0.1', port=server.server_address[1])
+      run("redis dedup", RedisDedupStore(email_server.logger, client, 600), '')
+      server.shutdown()
+  email_server.logger.disabled = False
+
+BENCHMARKS = {
+  'dedup': bench_dedup,
+  'client': bench_client,
+  'bulk': bench_bulk,
+  'smtp': bench_smtp,
+  'outbox': bench_outbox,
+  'queue': bench_queue,
+  'render': bench_render,
+}
+
+if __name__ == '__main__':
+  for name in sys.argv[1:] or sorted(BENCHMARKS):
+    print("== {}".format(name))
+    BENCHMARKS[name]()
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+def dedup_key(request):
+  """Returns the order id plus a hash of the whole request, or None for
+  requests without an order id, which are never deduplicated."""
+  order_id = request.order.order_id
+  if not order_id:
+    return None
+  digest = hashlib.blake2b(request.SerializeToString(deterministic=True), digest_size=16).hexdigest()
+  return '{}:{}'.format(order_id, digest)
+
+# what claim() found for a key
+NEW = 'new'
+PENDING = 'pending'
+ACCEPTED = 'accepted'
+
+class MemoryDedupStore(object):
+  """Keys of recently accepted requests, kept in this process.
+
+  A key is claimed as pending for `pending_ttl` seconds while its request
+  is handled, and kept for `ttl` seconds once the request was accepted. A
+  pending key whose request never finished, e.g. because the process died,
+  expires quickly, so a retry is handled again. Holds at most
+  `max_entries` keys.
+  """
+
+  def __init__(self, max_entries, ttl, pending_ttl=30):
+    self._max_entries = max_entries
+    self._ttl = ttl
+    self._pending_ttl = pending_ttl
+    self._lock = threading.Lock()
+    # key -> (expiry, accepted)
+    self._entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def claim(self, keys):
+    """Returns one state per key: NEW if the key was free and is now claimed
+    as pending, else PENDING or ACCEPTED for the request that claimed it
+    before. None keys are always NEW."""
+    now = time.monotonic()
+    states = []
+    with self._lock:
+      for key in keys:
+        if key is None:
+          states.append(NEW)
+          continue
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+          self.hits += 1
+          states.append(ACCEPTED if entry[1] else PENDING)
+          continue
+        self.misses += 1
+        self._put(key, now + self._pending_ttl, False)
+        states.append(NEW)
+    return states
+
+  def accept(self, keys):
+    """Keeps claimed keys for the full ttl, once their requests are accepted."""
+    expires = time.monotonic() + self._ttl
+    with self._lock:
+      for key in keys:
+        if key is not None:
+          self._put(key, expires, True)
+
+  def release(self, keys):
+    """Forgets claimed keys whose requests failed, so that a retry is not skipped."""
+    with self._lock:
+      for key in keys:
+        if key is not None:
+          self._entries.pop(key, None)
+
+  def stats(self):
+    with self._lock:
+      return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+  def _put(self, key, expires, accepted):
+    self._entries[key] = (expires, accepted)
+    self._entries.move_to_end(key)
+    if len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+
+class RedisDedupStore(object):
+  """MemoryDedupStore shared by all email service pods through Redis.
+
+  Keys are claimed with SET NX EX in one pipelined round trip, plus one
+  MGET for keys that were taken, and marked accepted in another. If Redis
+  can't be reached every key counts as new: the outbox still catches
+  duplicates, and a duplicate email is better than a lost one.
+  """
+
+  def __init__(self, logger, client, ttl, pending_ttl=30, prefix='emailservice:dedup:'):
+    self._logger = logger
+    self._client = client
+    self._ttl = int(ttl)
+    self._pending_ttl = max(1, int(pending_ttl))
+    self._prefix = prefix
+
+  def claim(self, keys):
+    try:
+      pipe = self._client.pipeline(transaction=False)
+      for key in keys:
+        if key is not None:
+          pipe.set(self._prefix + key, PENDING, nx=True, ex=self._pending_ttl)
+      claimed = iter(pipe.execute())
+      states = [NEW if key is None or next(claimed) else None for key in keys]
+      taken = [key for key, state in zip(keys, states) if state is None]
+      if taken:
+        values = iter(self._client.mget([self._prefix + key for key in taken]))
+        # a key that expired in between was still being handled, as far as
+        # we know
+        states = [state or (ACCEPTED if next(values) == ACCEPTED.encode() else PENDING)
+                  for state in states]
+    except redis.RedisError as err:
+      self._logger.warning("dedup store unavailable, not deduplicating: {}".format(err))
+      return [NEW] * len(keys)
+    return states
+
+  def accept(self, keys):
+    keys = [self._prefix + key for key in keys if key is not None]
+    if not keys:
+      return
+    try:
+      pipe = self._client.pipeline(transaction=False)
+      for key in keys:
+        pipe.set(key, ACCEPTED, ex=self._ttl)
+      pipe.execute()
+    except redis.RedisError as err:
+      self._logger.warning("could not mark dedup keys accepted: {}".format(err))
+
+  def release(self, keys):
+    keys = [self._prefix + key for key in keys if key is not None]
+    if not keys:
+      return
+    try:
+      self._client.delete(*keys)
+    except redis.RedisError as err:
+      self._logger.warning("could not release dedup keys: {}".format(err))
+
+  def stats(self):
+    return {}
+
+def create_dedup_store(logger):
+  """Returns the dedup store configured in the environment, or None.
+
+  EMAIL_DEDUP_REDIS_ADDR  host:port of a Redis server to share the store
+                          between pods (default: kept in process)
+  EMAIL_DEDUP_SIZE        keys kept in process, 0 to disable (default 10000)
+  EMAIL_DEDUP_TTL         seconds a request is remembered (default 600)
+  EMAIL_DEDUP_PENDING_TTL seconds a request is remembered while it is handled,
+                          so that one that never finishes is retried (default 30)
+  """
+  ttl = float(os.environ.get('EMAIL_DEDUP_TTL', "600"))
+  pending_ttl = float(os.environ.get('EMAIL_DEDUP_PENDING_TTL', "30"))
+  redis_addr = os.environ.get('EMAIL_DEDUP_REDIS_ADDR', '')
+  if redis_addr:
+    host, _, port = redis_addr.rpartition(':')
+    client = redis.Redis(host=host, port=int(port), socket_timeout=1, socket_connect_timeout=1)
+    logger.info("deduplicating confirmation emails through redis at {}".format(redis_addr))
+    return RedisDedupStore(logger, client, ttl, pending_ttl)
+  max_entries = int(os.environ.get('EMAIL_DEDUP_SIZE', "10000"))
+  if max_entries <= 0:
+    return None
+  return MemoryDedupStore(max_entries, ttl, pending_ttl)
@@ -14,6 +14,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
+import json
+import os
+import threading
+
 import grpc
 
 import demo_pb2
@@ -22,14 +27,111 @@ import demo_pb2_grpc
 from logger import getJSONLogger
 logger = getJSONLogger('emailservice-client')
 
+# Confirmations are idempotent by order id, so calls are retried when the
+# server is unreachable or sheds load.
+SERVICE_CONFIG = json.dumps({
+  'methodConfig': [{
+    'name': [{'service': 'hipstershop.EmailService'}],
+    'retryPolicy': {
+      'maxAttempts': 4,
+      'initialBackoff': '0.1s',
+      'maxBackoff': '1s',
+      'backoffMultiplier': 2,
+      'retryableStatusCodes': ['UNAVAILABLE', 'RESOURCE_EXHAUSTED'],
+    },
+  }],
+})
+
+class ClientConfig(object):
+  """Email client settings, read from the environment.
+
+  EMAIL_SERVICE_ADDR      address of the email service (default 0.0.0.0:8080)
+  EMAIL_CLIENT_CHANNELS   channels, each with its own connection, that calls
+                          are spread over (default 1)
+  EMAIL_CLIENT_TIMEOUT    deadline of a call in seconds (default 5)
+  """
+
+  def __init__(self):
+    self.target = os.environ.get('EMAIL_SERVICE_ADDR', '0.0.0.0:8080')
+    self.channels = int(os.environ.get('EMAIL_CLIENT_CHANNELS', "1"))
+    self.timeout = float(os.environ.get('EMAIL_CLIENT_TIMEOUT', "5"))
+
+  def channel_options(self):
+    return [
+      ('grpc.service_config', SERVICE_CONFIG),
+      ('grpc.enable_retries', 1),
+      # otherwise channels to the same target share one connection
+      ('grpc.use_local_subchannel_pool', 1),
+    ]
+
+class EmailClient(object):
+  """Email service client that reuses its channels for every call."""
+
+  def __init__(self, config=None):
+    self._config = config or ClientConfig()
+    self._channels = [grpc.insecure_channel(self._config.target, options=self._config.channel_options())
+                      for _ in range(self._config.channels)]
+    self._stubs = itertools.cycle([demo_pb2_grpc.EmailServiceStub(channel) for channel in self._channels])
+
+  def send_order_confirmation(self, email, order, timeout=None):
+    return next(self._stubs).SendOrderConfirmation(
+      demo_pb2.SendOrderConfirmationRequest(email=email, order=order),
+      timeout=timeout or self._config.timeout)
+
+  def send_order_confirmations(self, requests, timeout=None):
+    """Sends an iterable of SendOrderConfirmationRequest over one stream.
+
+    `timeout` applies to the whole stream and defaults to none at all.
+    """
+    return next(self._stubs).SendOrderConfirmations(iter(requests), timeout=timeout)
+
+  def close(self):
+    for channel in self._channels:
+      channel.close()
+
+class AsyncEmailClient(object):
+  """grpc.aio variant of EmailClient; create and use it on one event loop."""
+
+  def __init__(self, config=None):
+    self._config = config or ClientConfig()
+    self._channels = [grpc.aio.insecure_channel(self._config.target, options=self._config.channel_options())
+                      for _ in range(self._config.channels)]
+    self._stubs = itertools.cycle([demo_pb2_grpc.EmailServiceStub(channel) for channel in self._channels])
+
+  async def send_order_confirmation(self, email, order, timeout=None):
+    return await next(self._stubs).SendOrderConfirmation(
+      demo_pb2.SendOrderConfirmationRequest(email=email, order=order),
+      timeout=timeout or self._config.timeout)
+
+  async def send_order_confirmations(self, requests, timeout=None):
+    return await next(self._stubs).SendOrderConfirmations(requests, timeout=timeout)
+
+  async def close(self):
+    for channel in self._channels:
+      await channel.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+  """Returns the process-wide EmailClient."""
+  global _client
+  with _client_lock:
+    if _client is None:
+      _client = EmailClient()
+    return _client
+
+def _forget_client():
+  # channels can't be used across fork(), the child builds its own
+  global _client, _client_lock
+  _client = None
+  _client_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_client)
+
 def send_confirmation_email(email, order):
-  channel = grpc.insecure_channel('0.0.0.0:8080')
-  stub = demo_pb2_grpc.EmailServiceStub(channel)
   try:
-    response = stub.SendOrderConfirmation(demo_pb2.SendOrderConfirmationRequest(
-      email = email,
-      order = order
-    ))
+    get_client().send_order_confirmation(email, order)
     logger.info('Request sent.')
   except grpc.RpcError as err:
     logger.error(err.details())
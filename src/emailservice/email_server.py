@@ -14,15 +14,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from concurrent import futures
 import argparse
+import itertools
 import os
 import sys
 import time
 import grpc
 import traceback
-from jinja2 import Environment, FileSystemLoader, select_autoescape, TemplateError
-from google.api_core.exceptions import GoogleAPICallError
+import uuid
+from jinja2 import TemplateError
 from google.auth.exceptions import DefaultCredentialsError
 
 import demo_pb2
@@ -39,6 +39,13 @@ from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExport
 # import googleclouddebugger
 import googlecloudprofiler
 
+from grpc_server import create_server
+from prefork import Supervisor
+from renderer import ConfirmationRenderer, TemplateRegistry
+from dedup import ACCEPTED, NEW, PENDING, create_dedup_store, dedup_key
+from outbox import Outbox
+from send_queue import OutgoingEmail, SendQueue
+from smtp_client import SMTPMailClient
 from logger import getJSONLogger
 logger = getJSONLogger('emailservice-server')
 
@@ -50,12 +57,15 @@ logger = getJSONLogger('emailservice-server')
 # except:
 #     pass
 
-# Loads confirmation email template from file
-env = Environment(
-    loader=FileSystemLoader('templates'),
-    autoescape=select_autoescape(['html', 'xml'])
-)
-template = env.get_template('confirmation.html')
+# Loads confirmation email templates, precompiled at build time if available,
+# in the variant for EMAIL_LOCALE and EMAIL_BRAND (default: none).
+# EMAIL_MAX_ITEMS items are listed at most, and the HTML and text parts are
+# kept under EMAIL_MAX_BYTES together by listing fewer.
+renderer = ConfirmationRenderer(TemplateRegistry(logger=logger),
+                                max_items=int(os.environ.get('EMAIL_MAX_ITEMS', "50")),
+                                max_bytes=int(os.environ.get('EMAIL_MAX_BYTES', "100000")),
+                                locale=os.environ.get('EMAIL_LOCALE', ''),
+                                brand=os.environ.get('EMAIL_BRAND', ''))
 
 class BaseEmailService(demo_pb2_grpc.EmailServiceServicer):
   def Check(self, request, context):
@@ -66,70 +76,202 @@ class BaseEmailService(demo_pb2_grpc.EmailServiceServicer):
     return health_pb2.HealthCheckResponse(
       status=health_pb2.HealthCheckResponse.UNIMPLEMENTED)
 
+  def stop(self):
+    pass
+
+# requests of a SendOrderConfirmations stream that are handled together
+BULK_BATCH_SIZE = 100
+
+_STATUS_CODES = {code.value[0]: code for code in grpc.StatusCode}
+
+def _failure(index, order_id, code, message):
+  return demo_pb2.SendOrderConfirmationFailure(
+    index=index, order_id=order_id, code=code.value[0], message=message)
+
 class EmailService(BaseEmailService):
-  def __init__(self):
-    raise Exception('cloud mail client not implemented')
+  def __init__(self, send_queue, outbox=None, dedup=None):
     super().__init__()
-
-  @staticmethod
-  def send_email(client, email_address, content):
-    response = client.send_message(
-      sender = client.sender_path(project_id, region, sender_id),
-      envelope_from_authority = '',
-      header_from_authority = '',
-      envelope_from_address = from_address,
-      simple_message = {
-        "from": {
-          "address_spec": from_address,
-        },
-        "to": [{
-          "address_spec": email_address
-        }],
-        "subject": "Your Confirmation Email",
-        "html_body": content
-      }
-    )
-    logger.info("Message sent: {}".format(response.rfc822_message_id))
+    # the RPC returns once the email is queued (and recorded in the outbox);
+    # send_queue workers deliver it
+    self.send_queue = send_queue
+    self.outbox = outbox
+    # recently accepted requests, so retries from checkout are skipped
+    # without a render or an outbox lookup
+    self.dedup = dedup
 
   def SendOrderConfirmation(self, request, context):
-    email = request.email
-    order = request.order
+    failures = self._accept([request], self.send_queue.enqueue_timeout)
+    if failures:
+      failure = failures[0]
+      context.set_details(failure.message)
+      context.set_code(_STATUS_CODES[failure.code])
+    return demo_pb2.Empty()
 
-    try:
-      confirmation = template.render(order = order)
-    except TemplateError as err:
-      context.set_details("An error occurred when preparing the confirmation mail.")
-      logger.error(err.message)
-      context.set_code(grpc.StatusCode.INTERNAL)
-      return demo_pb2.Empty()
+  def SendOrderConfirmations(self, request_iterator, context):
+    response = demo_pb2.SendOrderConfirmationsResponse()
+    requests = iter(request_iterator)
+    index = 0
+    while True:
+      # render and record a batch at a time: the outbox commits once per batch
+      batch = list(itertools.islice(requests, BULK_BATCH_SIZE))
+      if not batch:
+        break
+      # bulk senders wait for room in the queue for as long as their deadline allows
+      failures = self._accept(batch, context.time_remaining(), index)
+      response.accepted += len(batch) - len(failures)
+      response.failures.extend(failures)
+      index += len(batch)
+    logger.info("accepted %d of %d confirmation emails in bulk", response.accepted, index)
+    return response
 
+  def _accept(self, requests, timeout, first_index=0):
+    """Renders, records and enqueues confirmation emails.
+
+    Returns a SendOrderConfirmationFailure for each request that was not
+    accepted. Orders that were accepted before count as accepted.
+    """
+    failures = []
+    indexed = list(zip(itertools.count(first_index), requests))
+    # dedup keys this call claimed, by request index
+    keys = {}
+    # index of a repeated request in this call -> index of its first copy
+    copies = {}
+    if self.dedup:
+      request_keys = [dedup_key(request) for _, request in indexed]
+      # each key is claimed once: later copies of a request share the
+      # outcome of the first
+      first = {}
+      unique = []
+      for (index, request), key in zip(indexed, request_keys):
+        if key in first:
+          copies[index] = first[key]
+          continue
+        if key is not None:
+          first[key] = index
+        unique.append(((index, request), key))
+      states = self.dedup.claim([key for _, key in unique])
+      if states.count(ACCEPTED):
+        logger.info("skipping %d repeated confirmation requests", states.count(ACCEPTED))
+      new = []
+      for ((index, request), key), state in zip(unique, states):
+        if state == NEW:
+          new.append((index, request))
+          keys[index] = key
+        elif state == PENDING:
+          # another call is still handling it; if that one fails, the retry
+          # must not be skipped
+          failures.append(_failure(index, request.order.order_id, grpc.StatusCode.ABORTED,
+                                   "The confirmation email for this order is still being prepared."))
+      indexed = new
     try:
-      EmailService.send_email(self.client, email, confirmation)
-    except GoogleAPICallError as err:
-      context.set_details("An error occurred when sending the email.")
-      print(err.message)
-      context.set_code(grpc.StatusCode.INTERNAL)
-      return demo_pb2.Empty()
+      failures.extend(self._record_and_enqueue(indexed, timeout))
+    except BaseException:
+      # e.g. the outbox could not be written: the retry must not be skipped
+      if keys:
+        self.dedup.release(list(keys.values()))
+      raise
+    if keys:
+      failed = {failure.index for failure in failures}
+      self.dedup.release([key for index, key in keys.items() if index in failed])
+      self.dedup.accept([key for index, key in keys.items() if index not in failed])
+    if copies:
+      failed = {failure.index: failure for failure in failures}
+      for index, original in copies.items():
+        if original in failed:
+          failure = failed[original]
+          failures.append(demo_pb2.SendOrderConfirmationFailure(
+            index=index, order_id=failure.order_id, code=failure.code, message=failure.message))
+    failures.sort(key=lambda failure: failure.index)
+    return failures
 
-    return demo_pb2.Empty()
+  def _record_and_enqueue(self, indexed, timeout):
+    failures = []
+    # order ids are unique, so a known one is a retry from checkout
+    order_ids = [request.order.order_id or str(uuid.uuid4()) for _, request in indexed]
+    known = self.outbox.known(order_ids) if self.outbox else ()
+    if known:
+      logger.info("skipping %d orders whose confirmation email was already accepted", len(known))
+    emails = []
+    for (index, request), order_id in zip(indexed, order_ids):
+      if order_id in known:
+        continue
+      try:
+        confirmation = renderer.render(request.order)
+      except TemplateError as err:
+        logger.error(err.message)
+        failures.append(_failure(index, order_id, grpc.StatusCode.INTERNAL,
+                                 "An error occurred when preparing the confirmation mail."))
+        continue
+      emails.append((index, OutgoingEmail(request.email, confirmation.html, order_id, confirmation.text)))
+
+    if self.outbox:
+      added = self.outbox.add_many([email for _, email in emails])
+      emails = [pair for pair, is_new in zip(emails, added) if is_new]
+    enqueued = self.send_queue.put_many([email for _, email in emails], timeout)
+    rejected = emails[enqueued:]
+    if rejected:
+      if self.outbox:
+        self.outbox.discard([email.order_id for _, email in rejected])
+      logger.warning("email send queue is full, rejecting %d orders", len(rejected))
+      for index, email in rejected:
+        failures.append(_failure(index, email.order_id, grpc.StatusCode.RESOURCE_EXHAUSTED,
+                                 "Too many confirmation emails are waiting to be sent."))
+    return failures
+
+  def stop(self):
+    self.send_queue.stop(timeout=10)
+    if self.outbox:
+      self.outbox.close()
+
+def create_email_service(client):
+  """Returns an EmailService that delivers through `client`.
+
+  EMAIL_OUTBOX_PATH is the SQLite file unsent emails are kept in (default
+  outbox.db, empty to disable), and EMAIL_OUTBOX_RETENTION how many seconds
+  sent orders are remembered to skip retries (default 86400). Unsent emails
+  of a process that is gone are replayed by another one sharing the outbox
+  after EMAIL_OUTBOX_LEASE seconds (default 60), or right away if it was
+  stopped.
+  """
+  outbox = None
+  outbox_path = os.environ.get('EMAIL_OUTBOX_PATH', 'outbox.db')
+  if outbox_path:
+    outbox = Outbox(outbox_path, retention=float(os.environ.get('EMAIL_OUTBOX_RETENTION', "86400")),
+                    lease=float(os.environ.get('EMAIL_OUTBOX_LEASE', "60")))
+    outbox.start_purging()
+  send_queue = SendQueue(logger, client, outbox=outbox)
+  send_queue.start()
+  if outbox:
+    outbox.start_leasing(send_queue.replay)
+  return EmailService(send_queue, outbox, create_dedup_store(logger))
 
 class DummyEmailService(BaseEmailService):
   def SendOrderConfirmation(self, request, context):
-    logger.info('A request to send order confirmation email to {} has been received.'.format(request.email))
+    logger.info('A request to send order confirmation email to %s has been received.', request.email)
     return demo_pb2.Empty()
 
+  def SendOrderConfirmations(self, request_iterator, context):
+    accepted = sum(1 for _ in request_iterator)
+    logger.info('A request to send %d order confirmation emails has been received.', accepted)
+    return demo_pb2.SendOrderConfirmationsResponse(accepted=accepted)
+
 class HealthCheck():
   def Check(self, request, context):
     return health_pb2.HealthCheckResponse(
       status=health_pb2.HealthCheckResponse.SERVING)
 
-def start(dummy_mode):
-  server = grpc.server(futures.ThreadPoolExecutor(max_workers=10),)
+def start(dummy_mode, health_address=None):
+  server = create_server(logger)
   service = None
   if dummy_mode:
     service = DummyEmailService()
   else:
-    raise Exception('non-dummy mode not implemented yet')
+    service = create_email_service(SMTPMailClient(logger))
+    # EMAIL_TEMPLATE_RELOAD_INTERVAL seconds between checks for changed
+    # templates, 0 to never reload them
+    reload_interval = float(os.environ.get('EMAIL_TEMPLATE_RELOAD_INTERVAL', "2"))
+    if reload_interval > 0:
+      renderer.registry.start_reloading(reload_interval)
 
   demo_pb2_grpc.add_EmailServiceServicer_to_server(service, server)
   health_pb2_grpc.add_HealthServicer_to_server(service, server)
@@ -137,12 +279,15 @@ def start(dummy_mode):
   port = os.environ.get('PORT', "8080")
   logger.info("listening on port: "+port)
   server.add_insecure_port('[::]:'+port)
+  if health_address:
+    server.add_insecure_port(health_address)
   server.start()
   try:
     while True:
       time.sleep(3600)
   except KeyboardInterrupt:
     server.stop(0)
+    service.stop()
 
 def initStackdriverProfiling():
   project_id = None
@@ -170,9 +315,7 @@ def initStackdriverProfiling():
   return
 
 
-if __name__ == '__main__':
-  logger.info('starting the email service in dummy mode.')
-
+def main(health_address=None):
   # Profiler
   try:
     if "DISABLE_PROFILER" in os.environ:
@@ -204,4 +347,20 @@ if __name__ == '__main__':
   except Exception as e:
       logger.warn(f"Exception on Cloud Trace setup: {traceback.format_exc()}, tracing disabled.") 
   
-  start(dummy_mode = True)
+  # without an SMTP server, requests are only logged
+  start(dummy_mode = not os.environ.get('SMTP_HOST'), health_address = health_address)
+
+
+if __name__ == '__main__':
+  if os.environ.get('SMTP_HOST'):
+    logger.info('starting the email service, sending through {}.'.format(os.environ['SMTP_HOST']))
+  else:
+    logger.info('starting the email service in dummy mode.')
+
+  # SERVER_PROCESSES>1 forks that many servers sharing PORT, since a single
+  # process can only use one core for Python work
+  server_processes = int(os.environ.get('SERVER_PROCESSES', "1"))
+  if server_processes > 1:
+    Supervisor(logger, 'emailservice', server_processes).run(main)
+  else:
+    main()
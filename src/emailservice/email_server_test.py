@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import time
+
+import grpc
+import pytest
+
+import demo_pb2
+from dedup import MemoryDedupStore, dedup_key
+from email_server import EmailService
+from outbox import Outbox
+from send_queue import SendQueue
+from send_queue_test import FakeMailClient, logger, make_config
+
+class FakeContext(object):
+  def __init__(self):
+    self.code = None
+    self.details = None
+
+  def set_code(self, code):
+    self.code = code
+
+  def set_details(self, details):
+    self.details = details
+
+  def time_remaining(self):
+    return 1
+
+def make_request(order_id):
+  return demo_pb2.SendOrderConfirmationRequest(email='someone@example.com', order=demo_pb2.OrderResult(
+    order_id=order_id,
+    shipping_tracking_id='tracking',
+    shipping_cost=demo_pb2.Money(currency_code='USD', units=5),
+    items=[demo_pb2.OrderItem(item=demo_pb2.CartItem(product_id='product', quantity=1),
+                              cost=demo_pb2.Money(currency_code='USD', units=10, nanos=500000000))]))
+
+def test_a_full_send_queue_fails_the_rpc_with_resource_exhausted(tmp_path):
+  # nothing drains the queue, so it is full after one email
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path, max_size=1, enqueue_timeout=0.05))
+  service = EmailService(send_queue)
+  context = FakeContext()
+  service.SendOrderConfirmation(make_request('order-1'), context)
+  assert context.code is None
+  service.SendOrderConfirmation(make_request('order-2'), context)
+  assert context.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+  assert send_queue.stats()['rejected'] == 1
+
+class FlakyOutbox(Outbox):
+  """Outbox whose next `failures` writes fail as if the database were locked."""
+
+  def __init__(self, path, failures):
+    super(FlakyOutbox, self).__init__(path)
+    self.failures = failures
+
+  def add_many(self, emails):
+    if self.failures:
+      self.failures -= 1
+      raise sqlite3.OperationalError("database is locked")
+    return super(FlakyOutbox, self).add_many(emails)
+
+def test_repeated_requests_are_enqueued_once(tmp_path):
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path))
+  service = EmailService(send_queue, dedup=MemoryDedupStore(100, ttl=60))
+  for _ in range(2):
+    context = FakeContext()
+    service.SendOrderConfirmation(make_request('order-1'), context)
+    assert context.code is None
+  assert send_queue.stats()['enqueued'] == 1
+
+def test_a_request_that_is_still_handled_is_aborted(tmp_path):
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path))
+  dedup = MemoryDedupStore(100, ttl=60, pending_ttl=0.1)
+  service = EmailService(send_queue, dedup=dedup)
+  # e.g. another worker took it and has not accepted it yet
+  dedup.claim([dedup_key(make_request('order-1'))])
+  context = FakeContext()
+  service.SendOrderConfirmation(make_request('order-1'), context)
+  assert context.code == grpc.StatusCode.ABORTED
+  # the claim expires if that worker never finishes
+  time.sleep(0.15)
+  context = FakeContext()
+  service.SendOrderConfirmation(make_request('order-1'), context)
+  assert context.code is None
+  assert send_queue.stats()['enqueued'] == 1
+
+def test_a_request_that_raised_is_not_skipped_on_retry(tmp_path):
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path))
+  outbox = FlakyOutbox(str(tmp_path / 'outbox.db'), failures=1)
+  service = EmailService(send_queue, outbox, MemoryDedupStore(100, ttl=60))
+  with pytest.raises(sqlite3.OperationalError):
+    service.SendOrderConfirmation(make_request('order-1'), FakeContext())
+  context = FakeContext()
+  service.SendOrderConfirmation(make_request('order-1'), context)
+  assert context.code is None
+  assert send_queue.stats()['enqueued'] == 1
+  assert outbox.known(['order-1']) == {'order-1'}
+
+def test_copies_of_a_request_in_one_stream_share_its_outcome(tmp_path):
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path, max_size=1, enqueue_timeout=0.05))
+  service = EmailService(send_queue, dedup=MemoryDedupStore(100, ttl=60))
+  requests = [make_request('order-1'), make_request('order-1'), make_request('order-2'), make_request('order-2')]
+  response = service.SendOrderConfirmations(iter(requests), FakeContext())
+  # order-1 is accepted once; order-2 finds the queue full, and so does its copy
+  assert response.accepted == 2
+  assert [(failure.index, failure.order_id, failure.code) for failure in response.failures] == [
+    (2, 'order-2', grpc.StatusCode.RESOURCE_EXHAUSTED.value[0]),
+    (3, 'order-2', grpc.StatusCode.RESOURCE_EXHAUSTED.value[0])]
+  assert send_queue.stats()['enqueued'] == 1
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+
+# ISO 4217 digits after the decimal mark, where they are not 2
+_MINOR_UNITS = {
+  'BHD': 3, 'CLP': 0, 'ISK': 0, 'IQD': 3, 'JOD': 3, 'JPY': 0, 'KRW': 0,
+  'KWD': 3, 'LYD': 3, 'OMR': 3, 'PYG': 0, 'TND': 3, 'UGX': 0, 'VND': 0,
+}
+
+# decimal mark and digit group separator by locale, then by language;
+# anything else is formatted like English. Spaces are non-breaking, so an
+# amount never wraps.
+_SEPARATORS = {
+  'de_ch': ('.', '\u2019'),
+  'en': ('.', ','),
+  'ja': ('.', ','),
+  'ko': ('.', ','),
+  'zh': ('.', ','),
+  'he': ('.', ','),
+  'th': ('.', ','),
+  'de': (',', '.'),
+  'es': (',', '.'),
+  'id': (',', '.'),
+  'it': (',', '.'),
+  'nl': (',', '.'),
+  'pt': (',', '.'),
+  'tr': (',', '.'),
+  'da': (',', '.'),
+  'ro': (',', '.'),
+  'hr': (',', '.'),
+  'fr': (',', '\u202f'),
+  'bg': (',', '\u00a0'),
+  'cs': (',', '\u00a0'),
+  'fi': (',', '\u00a0'),
+  'hu': (',', '\u00a0'),
+  'nb': (',', '\u00a0'),
+  'pl': (',', '\u00a0'),
+  'ru': (',', '\u00a0'),
+  'sv': (',', '\u00a0'),
+}
+
+class MoneyFormatter(object):
+  """Formats amounts of one currency by the conventions of one locale,
+  e.g. "1,234.57 USD", "1.234,57 EUR" for "de" or "1,235 JPY".
+
+  Amounts are rounded half away from zero to the currency's minor unit.
+  """
+
+  def __init__(self, currency_code, locale=''):
+    self.currency_code = currency_code
+    self.digits = _MINOR_UNITS.get(currency_code, 2)
+    locale = locale.lower().replace('-', '_')
+    self.decimal_mark, self.group_separator = _SEPARATORS.get(
+      locale, _SEPARATORS.get(locale.partition('_')[0], _SEPARATORS['en']))
+    self._scale = 10 ** (9 - self.digits)
+    self._suffix = ' ' + currency_code if currency_code else ''
+
+  def format(self, money):
+    # units and nanos always have the same sign
+    nanos = abs(money.units * 1000000000 + money.nanos)
+    major, minor = divmod((nanos + self._scale // 2) // self._scale, 10 ** self.digits)
+    amount = '{:,}'.format(major)
+    if self.group_separator != ',':
+      amount = amount.replace(',', self.group_separator)
+    if self.digits:
+      amount = '{}{}{:0{}d}'.format(amount, self.decimal_mark, minor, self.digits)
+    sign = '-' if (money.units < 0 or money.nanos < 0) and (major or minor) else ''
+    return sign + amount + self._suffix
+
+@functools.lru_cache(maxsize=256)
+def get_formatter(currency_code, locale=''):
+  return MoneyFormatter(currency_code, locale)
+
+def format_money(money, locale=''):
+  return get_formatter(money.currency_code, locale).format(money)
+
+def format_many(moneys, locale=''):
+  """Formats a sequence of Money in one pass.
+
+  Orders repeat the same currency and often the same price, so formatters
+  are looked up once per currency and each distinct amount is formatted once.
+  """
+  formatters = {}
+  formatted = {}
+  result = []
+  for money in moneys:
+    key = (money.currency_code, money.units, money.nanos)
+    text = formatted.get(key)
+    if text is None:
+      formatter = formatters.get(key[0])
+      if formatter is None:
+        formatter = formatters[key[0]] = get_formatter(key[0], locale)
+      text = formatted[key] = formatter.format(money)
+    result.append(text)
+  return result
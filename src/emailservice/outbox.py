@@ -0,0 +1,247 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import threading
+import time
+import uuid
+
+from send_queue import OutgoingEmail
+
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+  order_id TEXT PRIMARY KEY,
+  email TEXT NOT NULL,
+  content TEXT NOT NULL,
+  text TEXT NOT NULL DEFAULT '',
+  status TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL,
+  owner TEXT NOT NULL DEFAULT '',
+  lease_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, created_at);
+"""
+
+class Outbox(object):
+  """Write-ahead log of rendered confirmation emails, kept in SQLite.
+
+  An email is recorded as pending before SendOrderConfirmation returns and
+  marked sent or failed by the send queue, so pending emails can be replayed
+  after a restart. Rows are keyed by order_id: an order that is already in
+  the outbox is not rendered or sent again. Sent and failed rows are kept
+  for `retention` seconds to catch retries, then purged.
+
+  The database runs in WAL mode with synchronous=NORMAL, so committed emails
+  survive the process being killed; only an OS crash can lose the most
+  recent commits.
+
+  Several processes can share the outbox, e.g. the SERVER_PROCESSES
+  workers. Each pending email is leased by the process that holds it in
+  memory, which renews its leases every `lease` / 3 seconds and gives them
+  up when it is closed. Only emails whose lease ran out, because their
+  process exited or died, are claimed for replay, by exactly one process.
+  """
+
+  def __init__(self, path, retention=86400, lease=60):
+    self._retention = retention
+    self._lease = lease
+    # identifies this process's leases
+    self.owner = uuid.uuid4().hex
+    self._lock = threading.Lock()
+    self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    self._db.execute('PRAGMA journal_mode=WAL')
+    self._db.execute('PRAGMA synchronous=NORMAL')
+    self._db.executescript(_SCHEMA)
+    # outboxes written before emails had a plain text part, or leases
+    self._add_column('text', "TEXT NOT NULL DEFAULT ''")
+    self._add_column('owner', "TEXT NOT NULL DEFAULT ''")
+    self._add_column('lease_until', 'REAL NOT NULL DEFAULT 0')
+
+  def _add_column(self, name, definition):
+    columns = [row[1] for row in self._db.execute('PRAGMA table_info(outbox)')]
+    if name in columns:
+      return
+    try:
+      self._db.execute('ALTER TABLE outbox ADD COLUMN {} {}'.format(name, definition))
+    except sqlite3.OperationalError:
+      # another process sharing the outbox added it first
+      if name not in [row[1] for row in self._db.execute('PRAGMA table_info(outbox)')]:
+        raise
+
+  def contains(self, order_id):
+    with self._lock:
+      row = self._db.execute('SELECT 1 FROM outbox WHERE order_id = ?', (order_id,)).fetchone()
+    return row is not None
+
+  def known(self, order_ids):
+    """Returns the subset of `order_ids` that is already in the outbox."""
+    known = set()
+    with self._lock:
+      # stay below SQLite's limit on the number of query parameters
+      for i in range(0, len(order_ids), 500):
+        chunk = order_ids[i:i + 500]
+        rows = self._db.execute('SELECT order_id FROM outbox WHERE order_id IN ({})'.format(
+          ','.join('?' * len(chunk))), chunk)
+        known.update(order_id for order_id, in rows)
+    return known
+
+  def add(self, email):
+    """Records `email` as pending. Returns False if its order is already known."""
+    return self.add_many([email])[0]
+
+  def add_many(self, emails):
+    """Records `emails` as pending in one transaction.
+
+    Returns one boolean per email, False where its order was already known.
+    """
+    now = time.time()
+    added = []
+    with self._lock:
+      self._db.execute('BEGIN')
+      try:
+        for email in emails:
+          cursor = self._db.execute(
+            'INSERT OR IGNORE INTO outbox '
+            '(order_id, email, content, text, status, created_at, updated_at, owner, lease_until) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (email.order_id, email.email_address, email.content, email.text, PENDING, now, now,
+             self.owner, now + self._lease))
+          added.append(cursor.rowcount == 1)
+        self._db.execute('COMMIT')
+      except BaseException:
+        self._db.execute('ROLLBACK')
+        raise
+    return added
+
+  def discard(self, order_ids):
+    """Forgets pending emails that were never acknowledged."""
+    with self._lock:
+      self._db.executemany('DELETE FROM outbox WHERE order_id = ? AND status = ?',
+                           [(order_id, PENDING) for order_id in order_ids])
+
+  def mark_sent(self, emails):
+    self._mark(emails, SENT)
+
+  def mark_failed(self, emails):
+    self._mark(emails, FAILED)
+
+  def pending(self):
+    """Returns the emails that were recorded but never sent, oldest first,
+    whoever holds them."""
+    with self._lock:
+      rows = self._db.execute(
+        'SELECT order_id, email, content, text, attempts FROM outbox WHERE status = ? ORDER BY created_at',
+        (PENDING,)).fetchall()
+    return self._emails(rows)
+
+  def claim(self):
+    """Leases the pending emails whose lease ran out to this process and
+    returns them, oldest first. Each email is returned by one claim() only,
+    in whichever process sharing the outbox gets to it first."""
+    now = time.time()
+    with self._lock:
+      # IMMEDIATE takes the write lock up front, so no other process can
+      # claim the same rows between the SELECT and the UPDATE
+      self._db.execute('BEGIN IMMEDIATE')
+      try:
+        rows = self._db.execute(
+          'SELECT order_id, email, content, text, attempts FROM outbox '
+          'WHERE status = ? AND lease_until < ? ORDER BY created_at', (PENDING, now)).fetchall()
+        self._db.executemany('UPDATE outbox SET owner = ?, lease_until = ? WHERE order_id = ?',
+                             [(self.owner, now + self._lease, row[0]) for row in rows])
+        self._db.execute('COMMIT')
+      except BaseException:
+        self._db.execute('ROLLBACK')
+        raise
+    return self._emails(rows)
+
+  def renew(self):
+    """Extends the leases of the pending emails this process holds."""
+    now = time.time()
+    with self._lock:
+      self._db.execute('UPDATE outbox SET lease_until = ? WHERE owner = ? AND status = ?',
+                       (now + self._lease, self.owner, PENDING))
+
+  def start_leasing(self, replay):
+    """Renews this process's leases in the background and passes emails
+    claimed from processes that are gone to `replay`, starting with those
+    left over from before this process started."""
+    def run():
+      while True:
+        try:
+          self.renew()
+          emails = self.claim()
+          if emails:
+            replay(emails)
+        except sqlite3.Error:
+          # e.g. the database is locked for longer than the busy timeout;
+          # the next round tries again before any lease runs out
+          pass
+        time.sleep(self._lease / 3)
+    thread = threading.Thread(target=run, name='email-outbox-lease', daemon=True)
+    thread.start()
+
+  def purge(self):
+    """Deletes sent and failed rows older than the retention period."""
+    with self._lock:
+      cursor = self._db.execute('DELETE FROM outbox WHERE status != ? AND updated_at < ?',
+                                (PENDING, time.time() - self._retention))
+    return cursor.rowcount
+
+  def start_purging(self, interval=3600):
+    def run():
+      while True:
+        try:
+          self.purge()
+        except sqlite3.Error:
+          # e.g. the database is locked; the rows are deleted next time
+          pass
+        time.sleep(interval)
+    thread = threading.Thread(target=run, name='email-outbox-purge', daemon=True)
+    thread.start()
+
+  def close(self):
+    # emails this process did not get to send can be claimed right away
+    with self._lock:
+      self._db.execute('UPDATE outbox SET lease_until = 0 WHERE owner = ? AND status = ?',
+                       (self.owner, PENDING))
+      self._db.close()
+
+  def _emails(self, rows):
+    emails = []
+    for order_id, email_address, content, text, attempts in rows:
+      email = OutgoingEmail(email_address, content, order_id, text)
+      email.attempts = attempts
+      emails.append(email)
+    return emails
+
+  def _mark(self, emails, status):
+    now = time.time()
+    with self._lock:
+      self._db.execute('BEGIN')
+      try:
+        self._db.executemany('UPDATE outbox SET status = ?, attempts = ?, updated_at = ? WHERE order_id = ?',
+                             [(status, email.attempts, now, email.order_id) for email in emails])
+        self._db.execute('COMMIT')
+      except BaseException:
+        self._db.execute('ROLLBACK')
+        raise
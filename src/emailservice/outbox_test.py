@@ -0,0 +1,143 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from outbox import Outbox
+from send_queue import SendQueue
+from send_queue_test import FakeMailClient, logger, make_config, make_emails, wait_for
+
+def order_ids(emails):
+  return sorted(email.order_id for email in emails)
+
+def test_emails_are_not_claimed_while_their_lease_is_held(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  worker, restarted = Outbox(path, lease=60), Outbox(path, lease=60)
+  worker.add_many(make_emails(3))
+  # e.g. a worker restarted next to one that still holds its emails
+  assert restarted.claim() == []
+  worker.renew()
+  assert restarted.claim() == []
+
+def test_emails_of_a_closed_outbox_are_claimed_once(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  stopped = Outbox(path)
+  stopped.add_many(make_emails(3))
+  stopped.close()
+  first, second = Outbox(path), Outbox(path)
+  assert order_ids(first.claim()) == ['order-0', 'order-1', 'order-2']
+  assert second.claim() == []
+
+def test_expired_leases_are_claimed(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  crashed, survivor = Outbox(path, lease=0.1), Outbox(path, lease=0.3)
+  crashed.add_many(make_emails(2))
+  time.sleep(0.2)
+  emails = survivor.claim()
+  assert order_ids(emails) == ['order-0', 'order-1']
+  # the survivor holds them now, and renewing keeps them past its lease
+  time.sleep(0.2)
+  survivor.renew()
+  time.sleep(0.2)
+  assert crashed.claim() == []
+
+def test_concurrent_claims_never_return_an_email_twice(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  stopped = Outbox(path)
+  stopped.add_many(make_emails(200))
+  stopped.close()
+  # one outbox per worker, each with its own connection
+  workers = [Outbox(path) for _ in range(8)]
+  claimed = []
+  def run(outbox):
+    claimed.extend(email.order_id for email in outbox.claim())
+  threads = [threading.Thread(target=run, args=(outbox,)) for outbox in workers]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert sorted(claimed) == order_ids(make_emails(200))
+
+def test_sent_emails_are_not_claimed(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  stopped = Outbox(path)
+  emails = make_emails(2)
+  stopped.add_many(emails)
+  stopped.mark_sent(emails[:1])
+  stopped.close()
+  assert order_ids(Outbox(path).claim()) == ['order-1']
+
+def test_outboxes_without_leases_are_migrated(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  db = sqlite3.connect(path)
+  db.executescript("""
+    CREATE TABLE outbox (order_id TEXT PRIMARY KEY, email TEXT NOT NULL, content TEXT NOT NULL,
+                         status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                         created_at REAL NOT NULL, updated_at REAL NOT NULL);
+    INSERT INTO outbox VALUES ('order-0', 'someone@example.com', '<p>hi</p>', 'pending', 1, 0, 0);
+  """)
+  db.close()
+  emails = Outbox(path).claim()
+  assert order_ids(emails) == ['order-0']
+  assert emails[0].attempts == 1
+  assert emails[0].text == ''
+
+def lock(path):
+  """Returns a connection holding the outbox's write lock."""
+  db = sqlite3.connect(path, isolation_level=None)
+  db.execute('BEGIN IMMEDIATE')
+  return db
+
+def test_a_failed_update_leaves_no_transaction_open(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  outbox = Outbox(path)
+  outbox._db.execute('PRAGMA busy_timeout = 50')
+  emails = make_emails(2)
+  outbox.add_many(emails[:1])
+  db = lock(path)
+  with pytest.raises(sqlite3.OperationalError):
+    outbox.mark_sent(emails[:1])
+  db.execute('ROLLBACK')
+  assert outbox.add_many(emails[1:]) == [True]
+  outbox.mark_sent(emails)
+  outbox.close()
+  assert Outbox(path).claim() == []
+
+def test_send_queue_workers_survive_a_locked_outbox(tmp_path):
+  path = str(tmp_path / 'outbox.db')
+  outbox = Outbox(path)
+  outbox._db.execute('PRAGMA busy_timeout = 50')
+  client = FakeMailClient(failures={'order-1': 100})
+  send_queue = SendQueue(logger, client, make_config(tmp_path, max_attempts=1), outbox)
+  send_queue.start()
+  emails = make_emails(3)
+  outbox.add_many(emails)
+  db = lock(path)
+  send_queue.put_many(emails[:2])
+  # counted once the batch's outbox updates were tried
+  wait_for(lambda: send_queue.stats()['sent'] == 1)
+  db.execute('ROLLBACK')
+  # the worker is still there, and the outbox takes writes again
+  send_queue.put(emails[2])
+  wait_for(lambda: len(client.sent()) == 3)
+  send_queue.stop(timeout=5)
+  outbox.close()
+  # the emails that could not be marked are replayed
+  assert order_ids(Outbox(path).claim()) == ['order-0', 'order-1']
@@ -0,0 +1,176 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Generated from src/pylib/prefork.py by src/pylib/sync.sh, do not edit.
+
+import logging
+import mmap
+import os
+import signal
+import struct
+import threading
+import time
+import traceback
+
+import grpc
+from grpc_health.v1 import health_pb2
+from grpc_health.v1 import health_pb2_grpc
+
+_HEARTBEAT = struct.Struct('d')
+
+class Supervisor(object):
+  """Runs N forked copies of a gRPC server sharing one port via SO_REUSEPORT.
+
+  gRPC must not be initialized in a process that forks, so the supervisor
+  itself never creates channels or servers: everything happens in
+  `run_worker(health_address)`, which is called in each child and must serve
+  until interrupted. The child also listens on a private `health_address`
+  that it probes itself; a worker whose probes stop succeeding for
+  `health_timeout` seconds is killed. Workers that exit are restarted, and
+  SIGTERM/SIGINT are forwarded to all workers before the supervisor exits.
+  """
+
+  def __init__(self, logger, name, num_workers, health_interval=5, health_timeout=30, grace=10):
+    self._logger = logger
+    self._name = name
+    self._num_workers = num_workers
+    self._health_interval = health_interval
+    self._health_timeout = health_timeout
+    self._grace = grace
+    self._workers = {}
+    self._started_at = [0.0] * num_workers
+    self._stopping = False
+    # one heartbeat timestamp per worker slot, shared with the children
+    self._heartbeats = mmap.mmap(-1, _HEARTBEAT.size * num_workers)
+
+  def run(self, run_worker):
+    # every worker must be able to bind the same port
+    os.environ['GRPC_SO_REUSEPORT'] = "1"
+    signal.signal(signal.SIGTERM, self._stop)
+    signal.signal(signal.SIGINT, self._stop)
+    self._logger.info("starting {} worker processes".format(self._num_workers))
+    for slot in range(self._num_workers):
+      self._spawn(slot, run_worker)
+    while self._workers:
+      self._reap(run_worker)
+      if not self._stopping:
+        self._check_health()
+      time.sleep(1)
+    self._logger.info("all worker processes exited")
+
+  def _spawn(self, slot, run_worker):
+    self._beat(slot, time.monotonic())
+    self._started_at[slot] = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+      self._run_child(slot, run_worker)
+    self._workers[pid] = slot
+    self._logger.info("started worker {} (pid {})".format(slot, pid))
+
+  def _run_child(self, slot, run_worker):
+    # the existing serving loops stop on KeyboardInterrupt
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    health_address = 'unix-abstract:{}-worker-{}'.format(self._name, os.getpid())
+    thread = threading.Thread(target=self._probe_loop, args=(slot, health_address),
+                              name='prefork-health', daemon=True)
+    thread.start()
+    code = 1
+    try:
+      run_worker(health_address)
+      code = 0
+    except KeyboardInterrupt:
+      code = 0
+    except BaseException:
+      self._logger.error("worker {} crashed: {}".format(slot, traceback.format_exc()))
+    finally:
+      # whatever happens now, the child must never return into the
+      # supervisor's code; a second signal must not interrupt the shutdown
+      try:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # os._exit() skips atexit, so write out buffered logs first
+        logging.shutdown()
+      finally:
+        os._exit(code)
+
+  def _probe_loop(self, slot, health_address):
+    channel = grpc.insecure_channel(health_address)
+    stub = health_pb2_grpc.HealthStub(channel)
+    while True:
+      try:
+        response = stub.Check(health_pb2.HealthCheckRequest(), timeout=self._health_interval)
+        if response.status == health_pb2.HealthCheckResponse.SERVING:
+          self._beat(slot, time.monotonic())
+      except grpc.RpcError:
+        pass
+      time.sleep(self._health_interval)
+
+  def _beat(self, slot, timestamp):
+    _HEARTBEAT.pack_into(self._heartbeats, slot * _HEARTBEAT.size, timestamp)
+
+  def _last_beat(self, slot):
+    return _HEARTBEAT.unpack_from(self._heartbeats, slot * _HEARTBEAT.size)[0]
+
+  def _reap(self, run_worker):
+    while self._workers:
+      pid, status = os.waitpid(-1, os.WNOHANG)
+      if pid == 0:
+        return
+      slot = self._workers.pop(pid, None)
+      if slot is None:
+        continue
+      if self._stopping:
+        self._logger.info("worker {} (pid {}) exited".format(slot, pid))
+        continue
+      self._logger.warning("worker {} (pid {}) exited with status {}, restarting".format(slot, pid, status))
+      # don't spin if the worker crashes right away
+      delay = self._started_at[slot] + 1 - time.monotonic()
+      if delay > 0:
+        time.sleep(delay)
+        if self._stopping:
+          # a signal arrived while we slept; a worker forked now would never
+          # get its SIGTERM
+          self._logger.info("not restarting worker {}, stopping".format(slot))
+          continue
+      self._spawn(slot, run_worker)
+
+  def _check_health(self):
+    now = time.monotonic()
+    for pid, slot in list(self._workers.items()):
+      if now - self._last_beat(slot) > self._health_timeout:
+        self._logger.warning("worker {} (pid {}) failed health checks for {}s, killing".format(
+          slot, pid, self._health_timeout))
+        self._beat(slot, now)
+        os.kill(pid, signal.SIGKILL)
+
+  def _stop(self, signum, frame):
+    if self._stopping:
+      return
+    self._stopping = True
+    self._logger.info("received signal {}, stopping workers".format(signum))
+    for pid in self._workers:
+      os.kill(pid, signal.SIGTERM)
+    timer = threading.Timer(self._grace, self._kill_remaining)
+    timer.daemon = True
+    timer.start()
+
+  def _kill_remaining(self):
+    for pid in list(self._workers):
+      try:
+        os.kill(pid, signal.SIGKILL)
+      except ProcessLookupError:
+        pass
@@ -0,0 +1,314 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, TemplateError, TemplateNotFound, select_autoescape
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from money import format_many
+
+TEMPLATE_DIR = 'templates'
+COMPILED_TEMPLATE_DIR = 'compiled_templates'
+
+class DictEnvironment(Environment):
+  """Environment that resolves `a.b` on plain dicts with a single lookup.
+
+  Jinja's default getattr tries attribute access first and only falls back
+  to item access after an AttributeError, which is slow for dicts.
+  """
+
+  def getattr(self, obj, attribute):
+    if type(obj) is dict:
+      try:
+        return obj[attribute]
+      except KeyError:
+        return self.undefined(obj=obj, name=attribute)
+    return super().getattr(obj, attribute)
+
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_LINE_BREAK = re.compile(r'\s*\n\s*')
+
+def _join_lines(match):
+  # markup and template tags need no space between them, text does
+  source, start, end = match.string, match.start(), match.end()
+  if start == 0 or end == len(source) or source[start - 1] in '>}' or source[end] in '<{':
+    return ''
+  return ' '
+
+class MinifyHTML(Extension):
+  """Drops comments and line breaks from .html templates as they are compiled,
+  so rendering pays nothing for it."""
+
+  def preprocess(self, source, name, filename=None):
+    if not name or not name.endswith('.html'):
+      return source
+    return _LINE_BREAK.sub(_join_lines, _HTML_COMMENT.sub('', source))
+
+def create_environment(template_dir=TEMPLATE_DIR, compiled_dir=COMPILED_TEMPLATE_DIR):
+  # templates precompiled at build time skip parsing and compiling at startup
+  if compiled_dir and os.path.isdir(compiled_dir):
+    loader = ModuleLoader(compiled_dir)
+  else:
+    loader = FileSystemLoader(template_dir)
+  return DictEnvironment(
+    loader=loader,
+    autoescape=select_autoescape(['html', 'xml']),
+    extensions=[MinifyHTML]
+  )
+
+def compile_templates(template_dir=TEMPLATE_DIR, compiled_dir=COMPILED_TEMPLATE_DIR):
+  env = create_environment(template_dir, compiled_dir=None)
+  env.compile_templates(compiled_dir, zip=None)
+
+def order_to_dict(order, max_items=None, locale=''):
+  """Converts an OrderResult into the plain dicts the templates render.
+
+  Amounts are formatted for `locale` up front, so the templates only
+  interpolate strings. Only the first `max_items` items are listed;
+  `more_items` and `more_quantity` summarize the rest.
+  """
+  address = order.shipping_address
+  items = order.items if max_items is None else order.items[:max_items]
+  rest = order.items[len(items):]
+  costs = format_many([order.shipping_cost] + [x.cost for x in items], locale)
+  return {
+    'order_id': order.order_id,
+    'shipping_tracking_id': order.shipping_tracking_id,
+    'shipping_cost': costs[0],
+    'shipping_address': {
+      'street_address': address.street_address,
+      'city': address.city,
+      'state': address.state,
+      'country': address.country,
+      'zip_code': address.zip_code,
+    },
+    'items': [
+      {
+        'item': {
+          'product_id': x.item.product_id,
+          'quantity': x.item.quantity,
+        },
+        'cost': cost,
+      }
+      for x, cost in zip(items, costs[1:])
+    ],
+    'more_items': len(rest),
+    'more_quantity': sum(x.item.quantity for x in rest),
+  }
+
+class RenderedEmail(object):
+  def __init__(self, html, text):
+    self.html = html
+    self.text = text
+
+  @property
+  def size(self):
+    return len(self.html) + len(self.text)
+
+_VARIANT = re.compile(r'^[A-Za-z0-9_-]*$')
+
+class LoadedTemplate(object):
+  # `version` is unique across the registry and changes on every reload
+  def __init__(self, template, path, mtime, version):
+    self.template = template
+    self.path = path
+    self.mtime = mtime
+    self.version = version
+
+class TemplateRegistry(object):
+  """Named email templates with variants per locale and brand.
+
+  get(name, locale, brand) picks the most specific of <brand>/<locale>/<name>,
+  <brand>/<name>, <locale>/<name> and <name> under `template_dir`. Templates
+  are compiled on first use, or loaded from `compiled_dir` if they were
+  precompiled and have not changed since, and the `max_templates` most
+  recently used are kept.
+
+  After start_reloading(), a background thread polls the source files every
+  `interval` seconds and swaps in a new version of any template that was
+  changed, added or removed. It compiles before swapping, so request
+  threads keep rendering the previous version meanwhile; a template that
+  fails to compile is logged and the previous version stays.
+  """
+
+  def __init__(self, template_dir=TEMPLATE_DIR, compiled_dir=COMPILED_TEMPLATE_DIR, max_templates=64, logger=None):
+    self.env = create_environment(template_dir, compiled_dir=None)
+    self._compiled_env = None
+    if compiled_dir and os.path.isdir(compiled_dir):
+      self._compiled_env = create_environment(template_dir, compiled_dir)
+      self._compiled_at = os.stat(compiled_dir).st_mtime_ns
+    self._template_dir = template_dir
+    self._max_templates = max_templates
+    self._logger = logger
+    self._versions = itertools.count(1)
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()
+    self._failed = {}
+
+  def get(self, name, locale='', brand=''):
+    key = (name, locale, brand)
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        self._entries.move_to_end(key)
+        return entry
+    entry = self._load(key)
+    with self._lock:
+      entry = self._entries.setdefault(key, entry)
+      self._entries.move_to_end(key)
+      if len(self._entries) > self._max_templates:
+        self._entries.popitem(last=False)
+    return entry
+
+  def versions(self):
+    with self._lock:
+      return {'/'.join(filter(None, key[::-1])): entry.version for key, entry in self._entries.items()}
+
+  def reload(self):
+    """Reloads the cached templates whose source changed. Returns how many."""
+    with self._lock:
+      entries = list(self._entries.items())
+    reloaded = 0
+    for key, entry in entries:
+      path, mtime = self._resolve(key)
+      if path is None or (path, mtime) in ((entry.path, entry.mtime), self._failed.get(key)):
+        continue
+      try:
+        new = self._load(key, precompiled=False)
+      except (TemplateError, OSError) as err:
+        self._failed[key] = (path, mtime)
+        self._log('error', "could not reload template {}: {}".format(path, err))
+        continue
+      self._failed.pop(key, None)
+      with self._lock:
+        # leave it out if it was evicted meanwhile
+        if self._entries.get(key) is entry:
+          self._entries[key] = new
+          reloaded += 1
+      self._log('info', "reloaded template {} as version {}".format(new.path, new.version))
+    return reloaded
+
+  def start_reloading(self, interval=2):
+    def run():
+      while True:
+        time.sleep(interval)
+        self.reload()
+    thread = threading.Thread(target=run, name='email-template-reload', daemon=True)
+    thread.start()
+
+  def _candidates(self, key):
+    name, locale, brand = key
+    if not (_VARIANT.match(locale) and _VARIANT.match(brand)):
+      raise ValueError("invalid template variant {!r}/{!r}".format(brand, locale))
+    for parts in ((brand, locale), (brand,), (locale,), ()):
+      if all(parts):
+        yield '/'.join(parts + (name,))
+
+  def _resolve(self, key):
+    for path in self._candidates(key):
+      try:
+        return path, os.stat(os.path.join(self._template_dir, path)).st_mtime_ns
+      except OSError:
+        continue
+    return None, None
+
+  def _load(self, key, precompiled=True):
+    path, mtime = self._resolve(key)
+    if path is None:
+      raise TemplateNotFound(key[0])
+    template = None
+    # a source newer than the compiled templates was changed after the build
+    if precompiled and self._compiled_env is not None and mtime <= self._compiled_at:
+      try:
+        template = self._compiled_env.get_template(path)
+      except TemplateNotFound:
+        pass
+    if template is None:
+      template = self.env.get_template(path)
+    return LoadedTemplate(template, path, mtime, next(self._versions))
+
+  def _log(self, level, message):
+    if self._logger:
+      getattr(self._logger, level)(message)
+
+class ConfirmationRenderer(object):
+  """Renders the HTML and plain text parts of a confirmation email.
+
+  Templates come from `registry`, in the variant for `locale` and `brand`
+  unless render() is given others. At most `max_items` items are listed. If
+  the two parts together are still longer than `max_bytes` characters, the
+  order is rendered again with fewer items until they fit. Rows of the HTML
+  item table are cached: the same product, quantity and price show up in
+  many orders, so each distinct line item is rendered through
+  confirmation_item.html only once per template version.
+  """
+
+  def __init__(self, registry=None, max_items=50, max_bytes=100000, max_cached_rows=4096,
+               locale='', brand=''):
+    self.registry = registry or TemplateRegistry()
+    self.max_items = max_items
+    self.max_bytes = max_bytes
+    self.locale = locale
+    self.brand = brand
+    self.truncated = 0
+    self._max_cached_rows = max_cached_rows
+    self._rows = {}
+
+  def render(self, order, locale=None, brand=None):
+    variant = (self.locale if locale is None else locale, self.brand if brand is None else brand)
+    templates = (self.registry.get('confirmation.html', *variant),
+                 self.registry.get('confirmation.txt', *variant),
+                 self.registry.get('confirmation_item.html', *variant))
+    max_items = self.max_items
+    while True:
+      email = self._render(templates, order_to_dict(order, max_items, variant[0]))
+      shown = min(len(order.items), max_items)
+      if email.size <= self.max_bytes or shown == 0:
+        break
+      # cut the item list in proportion to how far over the cap we are
+      max_items = min(shown - 1, int(shown * self.max_bytes / email.size))
+    if max_items < len(order.items):
+      self.truncated += 1
+    return email
+
+  def _render(self, templates, order):
+    html, text, item = templates
+    return RenderedEmail(
+      html.template.render(order=order, item_row=functools.partial(self.item_row, item)),
+      text.template.render(order=order))
+
+  def item_row(self, item_template, item):
+    key = (item_template.version, item['item']['product_id'], item['item']['quantity'], item['cost'])
+    row = self._rows.get(key)
+    if row is None:
+      row = Markup(item_template.template.render(item=item))
+      if len(self._rows) >= self._max_cached_rows:
+        self._rows.clear()
+      self._rows[key] = row
+    return row
+
+if __name__ == '__main__':
+  # usage: python renderer.py [compiled_dir]
+  compile_templates(compiled_dir=sys.argv[1] if len(sys.argv) > 1 else COMPILED_TEMPLATE_DIR)
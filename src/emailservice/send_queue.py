@@ -0,0 +1,300 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+
+class PermanentError(Exception):
+  """Error a mail client returns for an email that can never be delivered,
+  e.g. to an address the server rejected. It is dead-lettered right away
+  instead of being retried."""
+
+class OutgoingEmail(object):
+  # `content` is the HTML body, `text` the optional plain text alternative
+  def __init__(self, email_address, content, order_id='', text=''):
+    self.email_address = email_address
+    self.content = content
+    self.text = text
+    self.order_id = order_id
+    self.attempts = 0
+    self.last_error = None
+
+class SendQueueConfig(object):
+  """Send queue settings, read from the environment.
+
+  EMAIL_QUEUE_SIZE          emails waiting to be sent before SendOrderConfirmation
+                            blocks (default 1000)
+  EMAIL_ENQUEUE_TIMEOUT     seconds to wait for room in a full queue before the
+                            RPC fails with RESOURCE_EXHAUSTED (default 1)
+  EMAIL_QUEUE_WORKERS       sender threads (default 2)
+  EMAIL_BATCH_SIZE          emails handed to the mail client at once (default 50)
+  EMAIL_BATCH_LINGER        seconds a worker waits for a batch to fill up before
+                            sending what it has (default 0)
+  EMAIL_MAX_ATTEMPTS        send attempts before an email is dead-lettered (default 5)
+  EMAIL_RETRY_BACKOFF       seconds before the first retry, doubled on every
+                            further attempt up to EMAIL_RETRY_BACKOFF_MAX
+                            (default 1 and 60)
+  EMAIL_DEAD_LETTER_PATH    file that undeliverable emails are appended to
+                            (default dead_letter.jsonl)
+  """
+
+  def __init__(self):
+    self.max_size = int(os.environ.get('EMAIL_QUEUE_SIZE', "1000"))
+    self.enqueue_timeout = float(os.environ.get('EMAIL_ENQUEUE_TIMEOUT', "1"))
+    self.workers = int(os.environ.get('EMAIL_QUEUE_WORKERS', "2"))
+    self.batch_size = int(os.environ.get('EMAIL_BATCH_SIZE', "50"))
+    self.batch_linger = float(os.environ.get('EMAIL_BATCH_LINGER', "0"))
+    self.max_attempts = int(os.environ.get('EMAIL_MAX_ATTEMPTS', "5"))
+    self.retry_backoff = float(os.environ.get('EMAIL_RETRY_BACKOFF', "1"))
+    self.retry_backoff_max = float(os.environ.get('EMAIL_RETRY_BACKOFF_MAX', "60"))
+    self.dead_letter_path = os.environ.get('EMAIL_DEAD_LETTER_PATH', 'dead_letter.jsonl')
+
+class SendQueue(object):
+  """Bounded queue of confirmation emails drained in batches by worker threads.
+
+  `client.send_batch(emails)` delivers a list of OutgoingEmail and returns a
+  list with one entry per email: None if it was sent, or the error. If it
+  raises, the whole batch failed. Failed emails are retried with exponential
+  backoff and jitter, and appended to the dead-letter file once they run out
+  of attempts, or right away for a PermanentError.
+
+  With an `outbox`, sent and dead-lettered emails are marked there, and
+  emails still waiting for a retry at shutdown are left pending in it for
+  the next start to replay instead of being dead-lettered.
+  """
+
+  def __init__(self, logger, client, config=None, outbox=None):
+    self._logger = logger
+    self._client = client
+    self._outbox = outbox
+    self._config = config or SendQueueConfig()
+    self._queue = queue.Queue(self._config.max_size)
+    self._retries = []
+    self._retry_seq = itertools.count()
+    self._retry_cv = threading.Condition()
+    self._dead_letter_lock = threading.Lock()
+    self._stats_lock = threading.Lock()
+    self._stats = {'enqueued': 0, 'rejected': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0}
+    self._stopping = False
+    self._threads = []
+
+  def start(self):
+    for i in range(self._config.workers):
+      self._start_thread(self._worker_loop, 'email-sender-{}'.format(i))
+    self._start_thread(self._retry_loop, 'email-retry')
+    self._logger.info("email send queue: size={} workers={} batch_size={} batch_linger={}".format(
+      self._config.max_size, self._config.workers, self._config.batch_size, self._config.batch_linger))
+
+  @property
+  def enqueue_timeout(self):
+    return self._config.enqueue_timeout
+
+  def put(self, email):
+    """Enqueues `email`, blocking while the queue is full.
+
+    Raises queue.Full if there is still no room after EMAIL_ENQUEUE_TIMEOUT.
+    """
+    if not self.put_many([email], self._config.enqueue_timeout):
+      raise queue.Full
+
+  def put_many(self, emails, timeout=None):
+    """Enqueues `emails` in order, waiting up to `timeout` seconds in total
+    for room (forever if None). Returns how many were enqueued."""
+    if timeout is not None and timeout >= threading.TIMEOUT_MAX:
+      # e.g. the time_remaining() of an RPC without deadline
+      timeout = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    enqueued = 0
+    try:
+      for email in emails:
+        if deadline is None:
+          self._queue.put(email)
+        else:
+          self._queue.put(email, timeout=max(0, deadline - time.monotonic()))
+        enqueued += 1
+    except queue.Full:
+      self._count('rejected', len(emails) - enqueued)
+    self._count('enqueued', enqueued)
+    return enqueued
+
+  def replay(self, emails):
+    """Enqueues emails left over from a previous run, in the background."""
+    if not emails:
+      return
+    self._logger.info("replaying {} unsent confirmation emails".format(len(emails)))
+    def run():
+      for email in emails:
+        if self._stopping:
+          return
+        self._queue.put(email)
+    self._start_thread(run, 'email-replay')
+
+  def stop(self, timeout=None):
+    """Stops accepting retries, sends what is queued, waits for the workers
+    and closes the client."""
+    self._stopping = True
+    with self._retry_cv:
+      self._retry_cv.notify()
+    for _ in range(self._config.workers):
+      self._queue.put(None)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in self._threads:
+      thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+    if hasattr(self._client, 'close'):
+      self._client.close()
+
+  def stats(self):
+    with self._stats_lock:
+      stats = dict(self._stats)
+    stats['queue_depth'] = self._queue.qsize()
+    with self._retry_cv:
+      stats['retry_pending'] = len(self._retries)
+    return stats
+
+  def _start_thread(self, target, name):
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    self._threads.append(thread)
+
+  def _count(self, name, n=1):
+    with self._stats_lock:
+      self._stats[name] += n
+
+  def _next_batch(self):
+    # block for the first email, then take whatever else is queued within
+    # the linger time
+    first = self._queue.get()
+    if first is None:
+      return None
+    batch = [first]
+    deadline = time.monotonic() + self._config.batch_linger
+    while len(batch) < self._config.batch_size:
+      timeout = deadline - time.monotonic()
+      try:
+        email = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+      except queue.Empty:
+        break
+      if email is None:
+        # leave the stop marker for the next round
+        self._queue.put(None)
+        break
+      batch.append(email)
+    return batch
+
+  def _worker_loop(self):
+    while True:
+      batch = self._next_batch()
+      if batch is None:
+        return
+      self._send(batch)
+
+  def _send(self, batch):
+    try:
+      errors = self._client.send_batch(batch)
+    except Exception as err:
+      self._logger.warning("sending {} emails failed: {}".format(len(batch), err))
+      errors = [err] * len(batch)
+    sent = []
+    for email, err in zip(batch, errors):
+      email.attempts += 1
+      if err is None:
+        sent.append(email)
+      else:
+        email.last_error = err
+        self._failed(email)
+    if sent and self._outbox:
+      self._record(self._outbox.mark_sent, sent)
+    self._count('sent', len(sent))
+
+  def _failed(self, email):
+    if email.attempts >= self._config.max_attempts or isinstance(email.last_error, PermanentError):
+      self._dead_letter(email)
+      return
+    if self._stopping:
+      self._abandon([email])
+      return
+    backoff = min(self._config.retry_backoff * 2 ** (email.attempts - 1), self._config.retry_backoff_max)
+    due = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+    with self._retry_cv:
+      heapq.heappush(self._retries, (due, next(self._retry_seq), email))
+      self._retry_cv.notify()
+    self._count('retried')
+
+  def _retry_loop(self):
+    while True:
+      with self._retry_cv:
+        while not self._stopping:
+          now = time.monotonic()
+          if self._retries and self._retries[0][0] <= now:
+            break
+          self._retry_cv.wait(self._retries[0][0] - now if self._retries else None)
+        if self._stopping:
+          pending = [email for _, _, email in self._retries]
+          self._retries = []
+        else:
+          pending = [heapq.heappop(self._retries)[2]]
+      if self._stopping:
+        self._abandon(pending)
+        return
+      # retries wait for room like new emails, but are never rejected
+      self._queue.put(pending[0])
+
+  def _abandon(self, emails):
+    if not emails:
+      return
+    if self._outbox:
+      self._logger.info("leaving {} unsent emails in the outbox".format(len(emails)))
+      return
+    for email in emails:
+      self._dead_letter(email)
+
+  def _record(self, mark, emails):
+    # e.g. the outbox database is locked. The emails stay pending there and
+    # are replayed once this process's leases end, which beats losing the
+    # worker.
+    try:
+      mark(emails)
+    except Exception as err:
+      self._logger.warning("could not update {} emails in the outbox: {}".format(len(emails), err))
+
+  def _dead_letter(self, email):
+    self._count('dead_lettered')
+    if self._outbox:
+      self._record(self._outbox.mark_failed, [email])
+    self._logger.error("giving up on confirmation email for order {} to {} after {} attempts: {}".format(
+      email.order_id, email.email_address, email.attempts, email.last_error))
+    record = json.dumps({
+      'timestamp': time.time(),
+      'order_id': email.order_id,
+      'email': email.email_address,
+      'attempts': email.attempts,
+      'error': str(email.last_error),
+      'content': email.content,
+      'text': email.text,
+    })
+    try:
+      with self._dead_letter_lock:
+        with open(self._config.dead_letter_path, 'a') as f:
+          f.write(record + '\n')
+    except OSError:
+      self._logger.error("could not write dead letter: {}".format(traceback.format_exc()))
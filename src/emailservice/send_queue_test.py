@@ -0,0 +1,176 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import queue
+import threading
+import time
+
+import pytest
+
+from send_queue import OutgoingEmail, SendQueue, SendQueueConfig
+
+logger = logging.getLogger('send_queue_test')
+
+class FakeMailClient(object):
+  """Stand-in mail client that records batches instead of sending them.
+
+  `failures` maps an order id to how many attempts to it fail before one
+  succeeds; `delay` is how long each batch takes to send.
+  """
+
+  def __init__(self, failures=None, delay=0):
+    self.failures = dict(failures or {})
+    self.delay = delay
+    self.batches = []
+    self.attempts = []
+    self.closed = False
+    self._lock = threading.Lock()
+
+  def send_batch(self, emails):
+    time.sleep(self.delay)
+    errors = []
+    with self._lock:
+      self.batches.append([email.order_id for email in emails])
+      for email in emails:
+        self.attempts.append((time.monotonic(), email.order_id))
+        if self.failures.get(email.order_id, 0) > 0:
+          self.failures[email.order_id] -= 1
+          errors.append(RuntimeError("temporary failure"))
+        else:
+          errors.append(None)
+    return errors
+
+  def sent(self):
+    with self._lock:
+      return [order_id for batch in self.batches for order_id in batch]
+
+  def close(self):
+    self.closed = True
+
+def make_config(tmp_path, **overrides):
+  config = SendQueueConfig()
+  config.max_size = 100
+  config.enqueue_timeout = 0.1
+  config.workers = 1
+  config.batch_size = 50
+  config.batch_linger = 0
+  config.max_attempts = 5
+  config.retry_backoff = 0.02
+  config.retry_backoff_max = 1
+  config.dead_letter_path = str(tmp_path / 'dead_letter.jsonl')
+  for name, value in overrides.items():
+    setattr(config, name, value)
+  return config
+
+def make_emails(n, prefix='order'):
+  return [OutgoingEmail('someone@example.com', '<p>hi</p>', '{}-{}'.format(prefix, i)) for i in range(n)]
+
+def wait_for(condition, timeout=5):
+  deadline = time.monotonic() + timeout
+  while not condition():
+    if time.monotonic() > deadline:
+      raise AssertionError("timed out")
+    time.sleep(0.005)
+
+def test_batches_are_capped_at_batch_size(tmp_path):
+  client = FakeMailClient()
+  send_queue = SendQueue(logger, client, make_config(tmp_path, batch_size=3))
+  # queued before the worker starts, so it finds all of them waiting
+  assert send_queue.put_many(make_emails(7)) == 7
+  send_queue.start()
+  send_queue.stop(timeout=5)
+  assert [len(batch) for batch in client.batches] == [3, 3, 1]
+  assert send_queue.stats()['sent'] == 7
+
+def test_linger_waits_for_a_batch_to_fill(tmp_path):
+  client = FakeMailClient()
+  send_queue = SendQueue(logger, client, make_config(tmp_path, batch_size=10, batch_linger=0.5))
+  send_queue.start()
+  first, second = make_emails(2)
+  send_queue.put(first)
+  time.sleep(0.05)
+  send_queue.put(second)
+  wait_for(lambda: len(client.sent()) == 2)
+  send_queue.stop(timeout=5)
+  assert client.batches == [['order-0', 'order-1']]
+
+def test_without_linger_queued_emails_are_sent_right_away(tmp_path):
+  client = FakeMailClient()
+  send_queue = SendQueue(logger, client, make_config(tmp_path, batch_size=10))
+  send_queue.start()
+  first, second = make_emails(2)
+  send_queue.put(first)
+  wait_for(lambda: len(client.sent()) == 1)
+  send_queue.put(second)
+  wait_for(lambda: len(client.sent()) == 2)
+  send_queue.stop(timeout=5)
+  assert client.batches == [['order-0'], ['order-1']]
+
+def test_failed_emails_are_retried_with_backoff(tmp_path):
+  client = FakeMailClient(failures={'order-0': 2})
+  send_queue = SendQueue(logger, client, make_config(tmp_path, retry_backoff=0.05))
+  send_queue.start()
+  send_queue.put(make_emails(1)[0])
+  wait_for(lambda: len(client.attempts) == 3)
+  send_queue.stop(timeout=5)
+  times = [at for at, _ in client.attempts]
+  # 0.05s and then 0.1s, with jitter down to half of that
+  assert times[1] - times[0] >= 0.025
+  assert times[2] - times[1] >= 0.05
+  stats = send_queue.stats()
+  assert stats['retried'] == 2
+  assert stats['sent'] == 1
+  assert stats['dead_lettered'] == 0
+
+def test_emails_are_dead_lettered_after_max_attempts(tmp_path):
+  client = FakeMailClient(failures={'order-0': 100})
+  config = make_config(tmp_path, max_attempts=3, retry_backoff=0.01)
+  send_queue = SendQueue(logger, client, config)
+  send_queue.start()
+  send_queue.put(make_emails(1)[0])
+  wait_for(lambda: send_queue.stats()['dead_lettered'] == 1)
+  send_queue.stop(timeout=5)
+  assert len(client.attempts) == 3
+  with open(config.dead_letter_path) as f:
+    records = [json.loads(line) for line in f]
+  assert len(records) == 1
+  assert records[0]['order_id'] == 'order-0'
+  assert records[0]['attempts'] == 3
+  assert records[0]['error'] == "temporary failure"
+
+def test_a_full_queue_pushes_back(tmp_path):
+  # no workers are started, so nothing drains the queue
+  send_queue = SendQueue(logger, FakeMailClient(), make_config(tmp_path, max_size=2))
+  start = time.monotonic()
+  assert send_queue.put_many(make_emails(5), timeout=0.1) == 2
+  assert time.monotonic() - start >= 0.1
+  with pytest.raises(queue.Full):
+    send_queue.put(make_emails(1, 'late')[0])
+  stats = send_queue.stats()
+  assert stats['enqueued'] == 2
+  assert stats['rejected'] == 4
+  assert stats['queue_depth'] == 2
+
+def test_stop_sends_everything_that_is_queued(tmp_path):
+  client = FakeMailClient(delay=0.01)
+  send_queue = SendQueue(logger, client, make_config(tmp_path, batch_size=2, workers=2))
+  send_queue.start()
+  assert send_queue.put_many(make_emails(20)) == 20
+  send_queue.stop(timeout=5)
+  assert sorted(client.sent()) == sorted(email.order_id for email in make_emails(20))
+  assert client.closed
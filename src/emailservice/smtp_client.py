@@ -0,0 +1,215 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import binascii
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+import uuid
+from email.utils import formatdate, make_msgid
+
+from send_queue import PermanentError
+
+SUBJECT = "Your Confirmation Email"
+
+def _part(content_type, content):
+  # quoted-printable keeps mostly-ASCII bodies about their own size, where
+  # base64 would add a third; smtplib sends bytes as they are, so line
+  # endings must already be CRLF
+  body = binascii.b2a_qp(content.encode('utf-8'), istext=True).replace(b'\n', b'\r\n')
+  return ('Content-Type: {}; charset="utf-8"\r\n'
+          'Content-Transfer-Encoding: quoted-printable\r\n'
+          '\r\n').format(content_type).encode('ascii') + body
+
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+
+def _is_permanent(err):
+  # a 5xx reply rejects the email itself, unless the login failed: that is
+  # fixed on our side, and the email can be sent once it is
+  if isinstance(err, smtplib.SMTPAuthenticationError):
+    return False
+  if isinstance(err, smtplib.SMTPRecipientsRefused):
+    return all(500 <= code < 600 for code, _ in err.recipients.values())
+  code = getattr(err, 'smtp_code', None)
+  return code is not None and 500 <= code < 600
+
+class SMTPConfig(object):
+  """SMTP delivery settings, read from the environment.
+
+  SMTP_HOST / SMTP_PORT             mail server (port defaults to 587, or 465
+                                    with SMTP_SSL=1)
+  SMTP_USERNAME / SMTP_PASSWORD     login, if the server requires one
+  SMTP_STARTTLS                     "1" to upgrade plain connections with
+                                    STARTTLS (default "1" unless SMTP_SSL=1)
+  SMTP_SSL                          "1" to connect with implicit TLS
+  SMTP_SENDER                       From address (default noreply@example.com)
+  SMTP_MAX_CONNECTIONS              open connections to the server (default 4)
+  SMTP_MAX_IDLE                     seconds an idle connection is kept (default 60)
+  SMTP_TIMEOUT                      socket timeout in seconds (default 10)
+  """
+
+  def __init__(self):
+    self.host = os.environ.get('SMTP_HOST', '')
+    self.use_ssl = os.environ.get('SMTP_SSL', "0") == "1"
+    self.port = int(os.environ.get('SMTP_PORT', "465" if self.use_ssl else "587"))
+    self.username = os.environ.get('SMTP_USERNAME', '')
+    self.password = os.environ.get('SMTP_PASSWORD', '')
+    self.starttls = os.environ.get('SMTP_STARTTLS', "0" if self.use_ssl else "1") == "1"
+    self.sender = os.environ.get('SMTP_SENDER', 'noreply@example.com')
+    self.max_connections = int(os.environ.get('SMTP_MAX_CONNECTIONS', "4"))
+    self.max_idle = float(os.environ.get('SMTP_MAX_IDLE', "60"))
+    self.timeout = float(os.environ.get('SMTP_TIMEOUT', "10"))
+
+class SMTPMailClient(object):
+  """Mail client for SendQueue that delivers over a pool of SMTP connections.
+
+  At most `max_connections` connections to the server are open at once.
+  Connections are logged in once and kept open between batches, and every
+  email of a batch is sent over the same connection. A connection that
+  fails is dropped and the email is retried once on a fresh one; idle
+  connections are closed after `max_idle` seconds. Emails that can't be
+  built or that the server rejects with a 5xx reply fail with a
+  PermanentError.
+
+  Each SendQueue worker holds one connection while it sends a batch, so
+  EMAIL_QUEUE_WORKERS above SMTP_MAX_CONNECTIONS only adds waiting threads.
+  """
+
+  def __init__(self, logger, config=None):
+    self._logger = logger
+    self._config = config or SMTPConfig()
+    self._idle = queue.LifoQueue()
+    self._slots = threading.BoundedSemaphore(self._config.max_connections)
+    self._tls_context = ssl.create_default_context()
+    self._domain = self._config.sender.rpartition('@')[2] or None
+
+  def send_batch(self, emails):
+    self._slots.acquire()
+    try:
+      conn = self._checkout()
+      errors = []
+      for email in emails:
+        conn, err = self._send(conn, email)
+        errors.append(err)
+        if conn is None and err is not None:
+          # no working connection, the rest of the batch would fail the same way
+          errors.extend([err] * (len(emails) - len(errors)))
+          break
+      if conn is not None:
+        self._idle.put((time.monotonic(), conn))
+      return errors
+    finally:
+      self._slots.release()
+
+  def close(self):
+    while True:
+      try:
+        _, conn = self._idle.get_nowait()
+      except queue.Empty:
+        return
+      self._quit(conn)
+
+  def _send(self, conn, email):
+    try:
+      message = self._message(email)
+    except ValueError as err:
+      return conn, PermanentError(err)
+    for attempt in range(2):
+      try:
+        if conn is None:
+          conn = self._connect()
+        conn.sendmail(self._config.sender, [email.email_address], message)
+        return conn, None
+      except OSError as err:
+        # SMTPException is an OSError too
+        if isinstance(err, smtplib.SMTPException) and not isinstance(err, _CONNECTION_ERRORS):
+          # rejected (or the login failed); unless the server is closing the
+          # connection with 421, it can still be used
+          if conn is not None and getattr(err, 'smtp_code', None) == 421:
+            self._quit(conn)
+            conn = None
+          return conn, PermanentError(err) if _is_permanent(err) else err
+        # the connection is gone, e.g. the server closed it while idle
+        self._logger.warning("smtp connection to {} failed: {}".format(self._config.host, err))
+        if conn is not None:
+          self._quit(conn)
+        conn = None
+        if attempt == 1:
+          return None, err
+
+  def _message(self, email):
+    # Built by hand: EmailMessage takes close to a millisecond per email,
+    # more than sending it over a pooled connection.
+    if '\r' in email.email_address or '\n' in email.email_address:
+      raise ValueError("invalid email address {!r}".format(email.email_address))
+    headers = (
+      'From: {}\r\n'
+      'To: {}\r\n'
+      'Subject: {}\r\n'
+      'Date: {}\r\n'
+      'Message-ID: {}\r\n'
+      'MIME-Version: 1.0\r\n'
+    ).format(self._config.sender, email.email_address, SUBJECT, formatdate(),
+             make_msgid(domain=self._domain)).encode('ascii')
+    html = _part('text/html', email.content)
+    if not email.text:
+      return headers + html
+    # "=_" never occurs in quoted-printable, so it can't clash with a body
+    boundary = '=_{}'.format(uuid.uuid4().hex).encode('ascii')
+    return b''.join([
+      headers,
+      b'Content-Type: multipart/alternative; boundary="', boundary, b'"\r\n\r\n',
+      b'--', boundary, b'\r\n', _part('text/plain', email.text), b'\r\n',
+      b'--', boundary, b'\r\n', html, b'\r\n',
+      b'--', boundary, b'--\r\n',
+    ])
+
+  def _checkout(self):
+    # most recently used first, so surplus connections go idle and expire
+    while True:
+      try:
+        last_used, conn = self._idle.get_nowait()
+      except queue.Empty:
+        return None
+      if time.monotonic() - last_used < self._config.max_idle:
+        return conn
+      self._quit(conn)
+
+  def _connect(self):
+    config = self._config
+    if config.use_ssl:
+      conn = smtplib.SMTP_SSL(config.host, config.port, timeout=config.timeout,
+                              context=self._tls_context)
+    else:
+      conn = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
+    try:
+      if config.starttls and not config.use_ssl:
+        conn.starttls(context=self._tls_context)
+      if config.username:
+        conn.login(config.username, config.password)
+    except BaseException:
+      conn.close()
+      raise
+    return conn
+
+  def _quit(self, conn):
+    try:
+      conn.quit()
+    except (smtplib.SMTPException, OSError):
+      conn.close()
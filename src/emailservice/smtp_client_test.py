@@ -0,0 +1,175 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import email
+import json
+import socket
+import threading
+import time
+from concurrent import futures
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from send_queue import OutgoingEmail, PermanentError, SendQueue
+from send_queue_test import logger, make_config, make_emails, wait_for
+from smtp_client import SMTPConfig, SMTPMailClient
+
+class RecordingHandler(object):
+  """aiosmtpd handler that keeps what it receives.
+
+  Recipients starting with "reject" are refused with 550 and those starting
+  with "busy" with 451; every DATA takes `delay` seconds.
+  """
+
+  def __init__(self, delay=0):
+    self.delay = delay
+    self.messages = []
+    self.sessions = []
+    self.active = 0
+    self.max_active = 0
+    self._lock = threading.Lock()
+
+  async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+    if address.startswith('reject'):
+      return '550 no such user'
+    if address.startswith('busy'):
+      return '451 try again later'
+    envelope.rcpt_tos.append(address)
+    return '250 OK'
+
+  async def handle_DATA(self, server, session, envelope):
+    with self._lock:
+      self.active += 1
+      self.max_active = max(self.max_active, self.active)
+      if session not in self.sessions:
+        self.sessions.append(session)
+    try:
+      await asyncio.sleep(self.delay)
+    finally:
+      with self._lock:
+        self.active -= 1
+        self.messages.append((server, envelope.rcpt_tos, envelope.content))
+    return '250 OK'
+
+def free_port():
+  with socket.socket() as sock:
+    sock.bind(('127.0.0.1', 0))
+    return sock.getsockname()[1]
+
+@pytest.fixture
+def handler():
+  return RecordingHandler()
+
+@pytest.fixture
+def smtp_server(handler):
+  controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+  controller.start()
+  yield controller
+  controller.stop()
+
+def make_client(smtp_server, **overrides):
+  config = SMTPConfig()
+  config.host = smtp_server.hostname
+  config.port = smtp_server.port
+  config.use_ssl = False
+  config.starttls = False
+  config.username = ''
+  config.timeout = 5
+  for name, value in overrides.items():
+    setattr(config, name, value)
+  return SMTPMailClient(logger, config)
+
+def test_batches_share_a_pooled_connection(smtp_server, handler):
+  client = make_client(smtp_server)
+  assert client.send_batch(make_emails(3)) == [None] * 3
+  assert client.send_batch(make_emails(2, 'later')) == [None] * 2
+  client.close()
+  assert len(handler.messages) == 5
+  assert len(handler.sessions) == 1
+
+def test_reconnects_after_the_server_drops_the_connection(smtp_server, handler):
+  client = make_client(smtp_server)
+  assert client.send_batch(make_emails(1)) == [None]
+  # the server closes the pooled connection, e.g. after its idle timeout
+  server = handler.messages[0][0]
+  smtp_server.loop.call_soon_threadsafe(server.transport.close)
+  time.sleep(0.1)
+  assert client.send_batch(make_emails(2, 'later')) == [None, None]
+  client.close()
+  assert len(handler.messages) == 3
+  assert len(handler.sessions) == 2
+
+def test_connections_are_capped(smtp_server, handler):
+  handler.delay = 0.05
+  client = make_client(smtp_server, max_connections=2)
+  with futures.ThreadPoolExecutor(6) as pool:
+    results = list(pool.map(lambda i: client.send_batch(make_emails(2, 'batch-{}'.format(i))), range(6)))
+  client.close()
+  assert results == [[None, None]] * 6
+  assert len(handler.messages) == 12
+  assert len(handler.sessions) <= 2
+  assert handler.max_active <= 2
+
+def test_emails_with_a_text_part_are_multipart_alternative(smtp_server, handler):
+  client = make_client(smtp_server)
+  html = '<p>Café order</p>\n' + '<p>{}</p>\n'.format('x' * 200)
+  text = 'Café order\n' + 'y' * 200 + '\n'
+  errors = client.send_batch([OutgoingEmail('someone@example.com', html, 'order-1', text),
+                              OutgoingEmail('someone@example.com', html, 'order-2')])
+  client.close()
+  assert errors == [None, None]
+  message = email.message_from_bytes(handler.messages[0][2])
+  assert message.get_content_type() == 'multipart/alternative'
+  parts = message.get_payload()
+  assert [part.get_content_type() for part in parts] == ['text/plain', 'text/html']
+  assert parts[0].get_payload(decode=True).decode('utf-8').replace('\r\n', '\n') == text
+  assert parts[1].get_payload(decode=True).decode('utf-8').replace('\r\n', '\n') == html
+  # quoted-printable keeps lines within the limit SMTP servers enforce
+  assert max(len(line) for line in handler.messages[0][2].split(b'\r\n')) <= 998
+  html_only = email.message_from_bytes(handler.messages[1][2])
+  assert html_only.get_content_type() == 'text/html'
+  assert html_only.get_payload(decode=True).decode('utf-8').replace('\r\n', '\n') == html
+
+def test_rejected_and_invalid_emails_fail_permanently(smtp_server, handler):
+  client = make_client(smtp_server)
+  errors = client.send_batch([
+    OutgoingEmail('reject@example.com', '<p>hi</p>', 'order-1'),
+    OutgoingEmail('busy@example.com', '<p>hi</p>', 'order-2'),
+    OutgoingEmail('bad\r\nBcc: x@example.com', '<p>hi</p>', 'order-3'),
+    OutgoingEmail('someone@example.com', '<p>hi</p>', 'order-4'),
+  ])
+  client.close()
+  assert isinstance(errors[0], PermanentError)
+  assert errors[1] is not None and not isinstance(errors[1], PermanentError)
+  assert isinstance(errors[2], PermanentError)
+  assert errors[3] is None
+  # the connection survives the rejections
+  assert len(handler.sessions) == 1
+
+def test_permanent_failures_are_dead_lettered_without_retries(smtp_server, tmp_path):
+  config = make_config(tmp_path, retry_backoff=0.01)
+  send_queue = SendQueue(logger, make_client(smtp_server), config)
+  send_queue.start()
+  send_queue.put(OutgoingEmail('reject@example.com', '<p>hi</p>', 'order-1'))
+  wait_for(lambda: send_queue.stats()['dead_lettered'] == 1)
+  send_queue.stop(timeout=5)
+  assert send_queue.stats()['retried'] == 0
+  with open(config.dead_letter_path) as f:
+    record = json.loads(f.readline())
+  assert record['attempts'] == 1
+  assert '550' in record['error']
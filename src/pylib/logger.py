@@ -0,0 +1,387 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# JSON logging shared by the Python services. Each service is built from its
+# own directory, so sync.sh copies this file into every one of them: edit
+# it here and run sync.sh.
+
+import collections
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from json.encoder import encode_basestring_ascii
+from logging.handlers import QueueHandler, QueueListener
+from opentelemetry import trace
+from pythonjsonlogger import jsonlogger
+
+_INFINITY = float('inf')
+
+def _encode_float(value):
+  # what json.dumps() writes for a float
+  if value != value:
+    return 'NaN'
+  if value in (_INFINITY, -_INFINITY):
+    return 'Infinity' if value > 0 else '-Infinity'
+  return float.__repr__(value)
+
+_ENCODERS = {
+  str: encode_basestring_ascii,
+  float: _encode_float,
+  int: int.__repr__,
+  bool: lambda value: 'true' if value else 'false',
+  type(None): lambda value: 'null',
+}
+
+class CustomJsonFormatter(jsonlogger.JsonFormatter):
+  """JsonFormatter with a fast path for most records.
+
+  The JSON object is assembled from key fragments precompiled from the
+  format string and values encoded by type with the C encoders that
+  json.dumps() uses, so the output is byte for byte what JsonFormatter
+  writes. Records with a dict message, an exception or stack info go
+  through JsonFormatter.
+  """
+
+  def __init__(self, *args, **kwargs):
+    super(CustomJsonFormatter, self).__init__(*args, **kwargs)
+    self._fast = not (self.rename_fields or self.static_fields or self.prefix or self.timestamp
+                      or self.json_indent is not None or not self.json_ensure_ascii
+                      or self.json_serializer is not json.dumps)
+    self._plain_keys = frozenset(self._skip_fields)
+    required = list(dict.fromkeys(self._required_fields))
+    self._fields = [self._field(field) for field in required]
+    # add_fields() adds timestamp and severity after any extra fields
+    self._tail = {field: self._field(field) for field in ('timestamp', 'severity') if field not in required}
+    self._all_fields = self._fields + list(self._tail.values())
+    # attribute names of records with extra fields -> their fields, as the
+    # same few call sites log most records
+    self._layouts = {}
+
+  def _field(self, field):
+    # the key fragment and a getter for the value add_fields() ends up with
+    key = encode_basestring_ascii(field) + ': '
+    if field == 'timestamp':
+      return key, lambda record: record.__dict__.get('timestamp') or record.created
+    if field == 'severity':
+      return key, lambda record: (record.__dict__.get('severity') or '').upper() or record.levelname
+    if field == 'asctime':
+      def asctime(record):
+        record.asctime = self.formatTime(record, self.datefmt)
+        return record.asctime
+      return key, asctime
+    return key, lambda record: record.__dict__.get(field)
+
+  def add_fields(self, log_record, record, message_dict):
+    super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
+    if not log_record.get('timestamp'):
+      log_record['timestamp'] = record.created
+    if log_record.get('severity'):
+      log_record['severity'] = log_record['severity'].upper()
+    else:
+      log_record['severity'] = record.levelname
+
+  def format(self, record):
+    if not self._fast or isinstance(record.msg, dict) or record.exc_info or record.exc_text or record.stack_info:
+      return super(CustomJsonFormatter, self).format(record)
+    fields = self._all_fields
+    if not record.__dict__.keys() <= self._plain_keys:
+      layout = tuple(record.__dict__)
+      fields = self._layouts.get(layout)
+      if fields is None:
+        if len(self._layouts) >= 256:
+          self._layouts.clear()
+        fields = self._layouts[layout] = self._extra_fields(layout)
+      if not fields:
+        return super(CustomJsonFormatter, self).format(record)
+    record.message = record.getMessage()
+    parts = []
+    for key, get in fields:
+      value = get(record)
+      encode = _ENCODERS.get(type(value))
+      parts.append(key + (encode(value) if encode else
+                          json.dumps(value, default=self.json_default, cls=self.json_encoder)))
+    return '{' + ', '.join(parts) + '}'
+
+  def _extra_fields(self, names):
+    # fields in the order add_fields() puts them in, or an empty list for
+    # records with attribute names JsonFormatter would have to convert
+    tail = dict(self._tail)
+    extra = []
+    for field in names:
+      if type(field) is not str:
+        return []
+      if field in self._skip_fields or field.startswith('_'):
+        continue
+      extra.append(tail.pop(field) if field in tail else self._field(field))
+    return self._fields + extra + list(tail.values())
+
+class TraceContextFilter(logging.Filter):
+  """Adds the `trace_id` and `span_id` of the current span to records, in
+  the hex form trace backends show them, so logs can be joined with traces.
+
+  It is set on the handler, so the context is only read for records that
+  are emitted, and on the thread that logs them, before AsyncHandler
+  passes them to its writer thread. Records logged outside of a span, e.g.
+  with tracing disabled, get neither field.
+  """
+
+  def __init__(self, max_spans=1024):
+    super(TraceContextFilter, self).__init__()
+    self._max_spans = max_spans
+    # (trace id, span id) -> their hex strings, as a span usually logs
+    # more than once
+    self._ids = {}
+
+  def filter(self, record):
+    context = trace.get_current_span().get_span_context()
+    if context.is_valid:
+      key = (context.trace_id, context.span_id)
+      ids = self._ids.get(key)
+      if ids is None:
+        if len(self._ids) >= self._max_spans:
+          self._ids.clear()
+        ids = self._ids[key] = ('{:032x}'.format(context.trace_id), '{:016x}'.format(context.span_id))
+      record.trace_id, record.span_id = ids
+    return True
+
+class LogBuffer(object):
+  """Bounded buffer of log records between the request threads and the
+  thread that writes them.
+
+  When it is full, put_nowait() drops the oldest record and counts it in
+  `dropped`, or with `block` waits until the writer makes room.
+  """
+
+  def __init__(self, max_size, block=False):
+    self._max_size = max_size
+    self._block = block
+    self._reset()
+
+  def _reset(self):
+    self._records = collections.deque()
+    self._lock = threading.Lock()
+    self._not_empty = threading.Condition(self._lock)
+    self._not_full = threading.Condition(self._lock)
+    self.dropped = 0
+
+  def put_nowait(self, record):
+    with self._lock:
+      if len(self._records) >= self._max_size:
+        if self._block:
+          while len(self._records) >= self._max_size:
+            self._not_full.wait()
+        else:
+          self._records.popleft()
+          self.dropped += 1
+      self._records.append(record)
+      self._not_empty.notify()
+
+  def get(self, block=True):
+    with self._lock:
+      while not self._records:
+        if not block:
+          raise queue.Empty
+        self._not_empty.wait()
+      record = self._records.popleft()
+      self._not_full.notify()
+      return record
+
+  def get_nowait(self):
+    return self.get(False)
+
+  def qsize(self):
+    with self._lock:
+      return len(self._records)
+
+class BatchStreamHandler(logging.StreamHandler):
+  """StreamHandler that collects formatted records and writes up to
+  `batch_size` of them with a single write() on flush()."""
+
+  def __init__(self, stream=None, batch_size=100):
+    super(BatchStreamHandler, self).__init__(stream)
+    self._batch_size = batch_size
+    self._pending = []
+
+  def emit(self, record):
+    try:
+      self._pending.append(self.format(record))
+    except Exception:
+      self.handleError(record)
+      return
+    if len(self._pending) >= self._batch_size:
+      self.flush()
+
+  def flush(self):
+    self.acquire()
+    try:
+      if self._pending:
+        lines, self._pending = self._pending, []
+        self.stream.write(self.terminator.join(lines) + self.terminator)
+      if hasattr(self.stream, 'flush'):
+        self.stream.flush()
+    except Exception:
+      pass
+    finally:
+      self.release()
+
+class BatchingQueueListener(QueueListener):
+  """QueueListener that flushes its handlers whenever the buffer runs empty,
+  so bursts are written in batches and quiet periods right away."""
+
+  def __init__(self, buffer, *handlers):
+    super(BatchingQueueListener, self).__init__(buffer, *handlers, respect_handler_level=True)
+    self._reported_drops = 0
+
+  def dequeue(self, block):
+    try:
+      return self.queue.get_nowait()
+    except queue.Empty:
+      pass
+    if self.queue.dropped > self._reported_drops:
+      dropped, self._reported_drops = self.queue.dropped - self._reported_drops, self.queue.dropped
+      self.handle(logging.LogRecord('logger', logging.WARNING, __file__, 0,
+                                    "log buffer full, dropped {} log records".format(dropped), None, None))
+    for handler in self.handlers:
+      handler.flush()
+    return self.queue.get(block)
+
+class AsyncHandler(QueueHandler):
+  """QueueHandler that leaves formatting and writing to a BatchingQueueListener
+  thread, and writes directly once the listener is stopped."""
+
+  def __init__(self, target, max_size=10000, block=False):
+    super(AsyncHandler, self).__init__(LogBuffer(max_size, block))
+    self._target = target
+    self._listener = BatchingQueueListener(self.queue, target)
+    self._listener.start()
+    os.register_at_fork(after_in_child=self._restart)
+
+  def prepare(self, record):
+    # only merge the arguments into the message here; the traceback stays
+    # apart from it, where the JSON formatter puts it in its own field
+    record = copy.copy(record)
+    record.msg = record.message = record.getMessage()
+    record.args = None
+    if record.exc_info:
+      record.exc_text = logging.Formatter().formatException(record.exc_info)
+      record.exc_info = None
+    return record
+
+  def emit(self, record):
+    if self._listener is None:
+      self._target.handle(record)
+    else:
+      super(AsyncHandler, self).emit(record)
+
+  def stats(self):
+    return {'queued': self.queue.qsize(), 'dropped': self.queue.dropped}
+
+  def close(self):
+    # called by logging.shutdown(): write out whatever is still buffered
+    listener, self._listener = self._listener, None
+    if listener is not None:
+      listener.stop()
+      self._target.flush()
+    super(AsyncHandler, self).close()
+
+  def _restart(self):
+    # the writer thread does not survive fork(), and the records still
+    # buffered are written by the parent
+    if self._listener is None:
+      return
+    self.queue._reset()
+    self._target._pending = []
+    self._listener = BatchingQueueListener(self.queue, self._target)
+    self._listener.start()
+
+def _parse_levels(spec):
+  # "name=LEVEL,other.name=LEVEL"
+  levels = {}
+  for item in spec.split(','):
+    name, _, level = item.strip().rpartition('=')
+    if level:
+      levels[name.strip()] = level.strip().upper()
+  return levels
+
+_handler = None
+_async_handler = None
+_handler_lock = threading.Lock()
+
+def _get_handler():
+  """Returns the handler that all loggers of the process share, creating it
+  on first use."""
+  global _handler, _async_handler
+  with _handler_lock:
+    if _handler is None:
+      formatter = CustomJsonFormatter('%(timestamp)s %(severity)s %(name)s %(message)s')
+      if os.environ.get('LOG_ASYNC', "0") == "1":
+        target = BatchStreamHandler(sys.stdout, int(os.environ.get('LOG_BATCH_SIZE', "100")))
+        target.setFormatter(formatter)
+        _handler = _async_handler = AsyncHandler(target,
+                                                 max_size=int(os.environ.get('LOG_BUFFER_SIZE', "10000")),
+                                                 block=os.environ.get('LOG_OVERFLOW', 'drop') == 'block')
+      else:
+        _handler = logging.StreamHandler(sys.stdout)
+        _handler.setFormatter(formatter)
+      _handler.addFilter(TraceContextFilter())
+    return _handler
+
+def getLogStats():
+  """Returns the records waiting to be written and dropped so far, or an
+  empty dict unless LOG_ASYNC is enabled."""
+  return _async_handler.stats() if _async_handler else {}
+
+def getLogLevel(name):
+  """Returns the level configured for logger `name`: its entry in
+  LOG_LEVELS, else that of the closest dotted parent, else LOG_LEVEL."""
+  levels = _parse_levels(os.environ.get('LOG_LEVELS', ''))
+  while name:
+    if name in levels:
+      return levels[name]
+    name = name.rpartition('.')[0]
+  return os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+def getJSONLogger(name):
+  """Returns the logger `name`, writing JSON lines to stdout. Calling it
+  again for the same name returns the same logger without adding another
+  handler.
+
+  Messages are best passed with %-style arguments, logger.info("x=%s", x):
+  they are then only formatted if the level is enabled. Records logged
+  within a span carry its trace_id and span_id.
+
+  LOG_LEVEL        level of every logger (default INFO)
+  LOG_LEVELS       levels of single loggers and their children, e.g.
+                   "recommendationservice-server=DEBUG,emailservice-client=WARNING"
+  LOG_ASYNC        "1" to format and write logs on a background thread
+                   instead of the calling one (default "0")
+  LOG_BUFFER_SIZE  records waiting to be written before LOG_OVERFLOW
+                   applies (default 10000)
+  LOG_OVERFLOW     "drop" to drop the oldest waiting record, counted and
+                   logged as a warning, or "block" to wait (default "drop")
+  LOG_BATCH_SIZE   records written at once (default 100)
+  """
+  logger = logging.getLogger(name)
+  handler = _get_handler()
+  if handler not in logger.handlers:
+    logger.addHandler(handler)
+    logger.setLevel(getLogLevel(name))
+    logger.propagate = False
+  return logger
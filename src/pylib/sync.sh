@@ -0,0 +1,43 @@
+#!/bin/bash -e
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Copies the shared modules into the Python services, which are each built
+# from their own directory.
+#
+# usage: ./sync.sh [--check]
+#   --check  only report copies that are out of date, and fail if any are
+
+cd "$(dirname "$0")"
+
+MODULES="grpc_server.py logger.py prefork.py"
+SERVICES="emailservice recommendationservice"
+
+status=0
+for service in $SERVICES; do
+  for module in $MODULES; do
+    copy="../$service/$module"
+    expected="$(awk -v note="# Generated from src/pylib/$module by src/pylib/sync.sh, do not edit." \
+      'NR == 17 { print note; print "" } { print }' "$module")"
+    if [ "$1" == "--check" ]; then
+      if [ "$expected" != "$(cat "$copy" 2>/dev/null)" ]; then
+        echo "$copy is out of date, run src/pylib/sync.sh"
+        status=1
+      fi
+    else
+      echo "$expected" > "$copy"
+    fi
+  done
+done
+exit $status
@@ -0,0 +1,239 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Micro-benchmarks for the recommendation service hot paths.
+#
+# usage: python benchmark.py [name ...]
+
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+import timeit
+from concurrent import futures
+
+import grpc
+from opentelemetry.sdk.trace import TracerProvider
+from pythonjsonlogger import jsonlogger
+
+import demo_pb2
+import demo_pb2_grpc
+from logger import AsyncHandler, BatchStreamHandler, CustomJsonFormatter, TraceContextFilter
+from recommender import CategoryIndex, ProductIndex
+from request_log import RequestLog
+
+class FakeProduct(object):
+    def __init__(self, product_id, categories):
+        self.id = product_id
+        self.categories = categories
+
+def fake_catalog(catalog_size, num_categories=50):
+    return [FakeProduct("product-{}".format(i),
+                        random.sample(["category-{}".format(c) for c in range(num_categories)], 2))
+            for i in range(catalog_size)]
+
+def legacy_sample(product_ids, excluded, k):
+    filtered_products = list(set(product_ids)-set(excluded))
+    num_products = len(filtered_products)
+    num_return = min(k, num_products)
+    indices = random.sample(range(num_products), num_return)
+    return [filtered_products[i] for i in indices]
+
+def report(name, number, seconds):
+    print("{:<40} {:>12.2f} us/call".format(name, seconds / number * 1e6))
+
+def bench_sampling():
+    for catalog_size in (10, 10000, 1000000):
+        product_ids = ["product-{}".format(i) for i in range(catalog_size)]
+        excluded = random.sample(product_ids, min(3, catalog_size))
+        index = ProductIndex(product_ids)
+        number = max(5, 100000 // catalog_size)
+        report("legacy    n={}".format(catalog_size), number,
+               timeit.timeit(lambda: legacy_sample(product_ids, excluded, 5), number=number))
+        report("indexed   n={}".format(catalog_size), number * 10,
+               timeit.timeit(lambda: index.sample(5, excluded), number=number * 10))
+
+def bench_categories():
+    for catalog_size in (10, 10000):
+        products = fake_catalog(catalog_size)
+        index = ProductIndex(x.id for x in products)
+        categories = CategoryIndex.build(products)
+        requested = [x.id for x in random.sample(products, min(3, catalog_size))]
+        report("build     n={}".format(catalog_size), 5,
+               timeit.timeit(lambda: CategoryIndex.build(products), number=5))
+        changed = products[:-1] + fake_catalog(1)
+        report("rebuild 1 changed n={}".format(catalog_size), 5,
+               timeit.timeit(lambda: CategoryIndex.build(changed, categories), number=5))
+        report("recommend n={}".format(catalog_size), 1000,
+               timeit.timeit(lambda: categories.recommend(index, 5, requested), number=1000))
+
+class FakeProductCatalog(demo_pb2_grpc.ProductCatalogServiceServicer):
+    def ListProducts(self, request, context):
+        return demo_pb2.ListProductsResponse(products=[
+            demo_pb2.Product(id="product-{}".format(i), categories=["category-{}".format(i % 3)])
+            for i in range(100)])
+
+def _load(port, duration, threads):
+    channel = grpc.insecure_channel('localhost:' + port)
+    stub = demo_pb2_grpc.RecommendationServiceStub(channel)
+    request = demo_pb2.ListRecommendationsRequest(user_id="bench", product_ids=["product-1"])
+    deadline = time.monotonic() + duration
+    def run():
+        count = 0
+        while time.monotonic() < deadline:
+            stub.ListRecommendations(request)
+            count += 1
+        return count
+    with futures.ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(lambda _: run(), range(threads)))
+
+def bench_prefork(duration=5, clients=8, port="18080"):
+    # clients run in their own processes so they don't compete for our GIL
+    catalog = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    demo_pb2_grpc.add_ProductCatalogServiceServicer_to_server(FakeProductCatalog(), catalog)
+    catalog_port = catalog.add_insecure_port('localhost:0')
+    catalog.start()
+    ctx = multiprocessing.get_context('spawn')
+    for processes in (1, 2, 4):
+        env = dict(os.environ, PORT=port, SERVER_PROCESSES=str(processes),
+                   PRODUCT_CATALOG_SERVICE_ADDR='localhost:{}'.format(catalog_port),
+                   DISABLE_PROFILER="1", DISABLE_DEBUGGER="1")
+        server = subprocess.Popen([sys.executable, 'recommendation_server.py'], env=env,
+                                  stdout=subprocess.DEVNULL)
+        try:
+            time.sleep(3)
+            with ctx.Pool(clients) as pool:
+                total = sum(pool.starmap(_load, [(port, duration, 4)] * clients))
+            print("{:<40} {:>12.0f} rpc/s".format("processes={}".format(processes), total / duration))
+        finally:
+            server.terminate()
+            server.wait()
+    catalog.stop(0)
+
+class LegacyJsonFormatter(jsonlogger.JsonFormatter):
+    # CustomJsonFormatter as it was before its fast path
+    def add_fields(self, log_record, record, message_dict):
+        super(LegacyJsonFormatter, self).add_fields(log_record, record, message_dict)
+        if not log_record.get('timestamp'):
+            log_record['timestamp'] = record.created
+        if log_record.get('severity'):
+            log_record['severity'] = log_record['severity'].upper()
+        else:
+            log_record['severity'] = record.levelname
+
+def bench_log_format(number=50000):
+    fmt = '%(timestamp)s %(severity)s %(name)s %(message)s'
+    legacy, formatter = LegacyJsonFormatter(fmt), CustomJsonFormatter(fmt)
+    records = [
+        logging.LogRecord('recommendationservice-server', logging.INFO, __file__, 1,
+                          "[Recv ListRecommendations] product_ids={}".format(['product-1', 'product-2']),
+                          None, None),
+        logging.LogRecord('recommendationservice-server', logging.WARNING, __file__, 1,
+                          "caf\u00e9 \"%s\"\n", ('quoted',), None),
+    ]
+    for record in records:
+        assert formatter.format(record) == legacy.format(record), formatter.format(record)
+    for name, f in (("jsonlogger", legacy), ("custom", formatter)):
+        seconds = min(timeit.repeat(lambda: f.format(records[0]), number=number, repeat=3))
+        print("{:<40} {:>12.0f} records/s".format(name, number / seconds))
+
+def bench_logging(number=20000):
+    # time spent in logger.info() on the calling thread, with stdout going
+    # to a pipe that a slow log collector drains at about 1 MB/s
+    reader = subprocess.Popen([sys.executable, '-c', 'import sys, time\n'
+                               'while sys.stdin.buffer.read1(65536): time.sleep(0.06)'],
+                              stdin=subprocess.PIPE)
+    stream = open(reader.stdin.fileno(), 'w', closefd=False)
+    formatter = CustomJsonFormatter('%(timestamp)s %(severity)s %(name)s %(message)s')
+    sync_handler = logging.StreamHandler(stream)
+    sync_handler.setFormatter(formatter)
+    target = BatchStreamHandler(stream)
+    target.setFormatter(formatter)
+    for name, handler in (("sync", sync_handler), ("async", AsyncHandler(target, max_size=number))):
+        logger = logging.getLogger('bench-' + name)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        logger.propagate = False
+        start = time.perf_counter()
+        for i in range(number):
+            logger.info("[Recv ListRecommendations] product_ids={}".format(['product-1', 'product-2']))
+        report("{:<6} caller".format(name), number, time.perf_counter() - start)
+        handler.close()
+        report("{:<6} caller + writer".format(name), number, time.perf_counter() - start)
+    reader.stdin.close()
+    reader.wait()
+
+def bench_request_log(number=50000):
+    # per-request logging cost of ListRecommendations, stdout to /dev/null
+    handler = logging.StreamHandler(open(os.devnull, 'w'))
+    handler.setFormatter(CustomJsonFormatter('%(timestamp)s %(severity)s %(name)s %(message)s'))
+    logger = logging.getLogger('bench-request-log')
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    logger.propagate = False
+    prod_list = ['product-{}'.format(i) for i in range(5)]
+    def legacy():
+        logger.info("[Recv ListRecommendations] product_ids={}".format(prod_list))
+    report("legacy   every request", number, timeit.timeit(legacy, number=number))
+    for name, request_log in (("unlimited", RequestLog(logger)),
+                              ("10/s", RequestLog(logger, rate=10)),
+                              ("sampled 1%", RequestLog(logger, sample_rate=0.01))):
+        def sampled():
+            with request_log.request('ListRecommendations') as entry:
+                entry.set("[Recv ListRecommendations] product_ids=%s", prod_list)
+        report("request_log {}".format(name), number, timeit.timeit(sampled, number=number))
+        print("         {}".format(request_log.stats()))
+
+def bench_trace_context(number=50000):
+    # cost of the trace context filter per emitted record, next to that of
+    # logging the record with stdout going to /dev/null
+    handler = logging.StreamHandler(open(os.devnull, 'w'))
+    handler.setFormatter(CustomJsonFormatter('%(timestamp)s %(severity)s %(name)s %(message)s'))
+    logger = logging.getLogger('bench-trace-context')
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    logger.propagate = False
+    trace_filter = TraceContextFilter()
+    record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "message", None, None)
+    prod_list = ['product-{}'.format(i) for i in range(5)]
+    def log():
+        logger.info("[Recv ListRecommendations] product_ids=%s", prod_list)
+    def best(func):
+        return min(timeit.repeat(func, number=number, repeat=5))
+    report("logger.info()", number, best(log))
+    report("filter outside a span", number, best(lambda: trace_filter.filter(record)))
+    with TracerProvider().get_tracer('benchmark').start_as_current_span('ListRecommendations'):
+        report("filter in a span", number, best(lambda: trace_filter.filter(record)))
+        handler.addFilter(trace_filter)
+        report("logger.info() with filter, in a span", number, best(log))
+
+BENCHMARKS = {
+    'categories': bench_categories,
+    'log_format': bench_log_format,
+    'logging': bench_logging,
+    'prefork': bench_prefork,
+    'request_log': bench_request_log,
+    'sampling': bench_sampling,
+    'trace_context': bench_trace_context,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or sorted(BENCHMARKS):
+        print("== {}".format(name))
+        BENCHMARKS[name]()
@@ -0,0 +1,168 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Generated from src/pylib/grpc_server.py by src/pylib/sync.sh, do not edit.
+
+import os
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from logger import getLogStats
+
+def _env_int(name, default=None):
+  value = os.environ.get(name, '')
+  return int(value) if value else default
+
+class ServerConfig(object):
+  """gRPC server and channel settings, read from the environment.
+
+  GRPC_MAX_WORKERS              size of the handler thread pool (default 10)
+  GRPC_MAX_CONCURRENT_RPCS      RPCs in flight (running or queued) before new
+                                ones fail fast with RESOURCE_EXHAUSTED
+  GRPC_MAX_QUEUE_DEPTH          alternative to GRPC_MAX_CONCURRENT_RPCS: RPCs
+                                allowed to wait for a free worker
+  GRPC_KEEPALIVE_TIME_MS        keepalive ping interval
+  GRPC_KEEPALIVE_TIMEOUT_MS     keepalive ping ack timeout
+  GRPC_MAX_RECEIVE_MESSAGE_LENGTH / GRPC_MAX_SEND_MESSAGE_LENGTH  in bytes
+  GRPC_SO_REUSEPORT             "1" or "0" to force SO_REUSEPORT on or off
+  GRPC_STATS_INTERVAL           seconds between server stats log lines (and
+                                log handler stats, with LOG_ASYNC=1)
+  """
+
+  def __init__(self):
+    self.max_workers = _env_int('GRPC_MAX_WORKERS', 10)
+    self.max_concurrent_rpcs = _env_int('GRPC_MAX_CONCURRENT_RPCS')
+    max_queue_depth = _env_int('GRPC_MAX_QUEUE_DEPTH')
+    if self.max_concurrent_rpcs is None and max_queue_depth is not None:
+      self.max_concurrent_rpcs = self.max_workers + max_queue_depth
+    self.keepalive_time_ms = _env_int('GRPC_KEEPALIVE_TIME_MS')
+    self.keepalive_timeout_ms = _env_int('GRPC_KEEPALIVE_TIMEOUT_MS')
+    self.max_receive_message_length = _env_int('GRPC_MAX_RECEIVE_MESSAGE_LENGTH')
+    self.max_send_message_length = _env_int('GRPC_MAX_SEND_MESSAGE_LENGTH')
+    self.so_reuseport = _env_int('GRPC_SO_REUSEPORT')
+    self.stats_interval = float(os.environ.get('GRPC_STATS_INTERVAL', "0"))
+
+  def channel_options(self):
+    options = []
+    if self.keepalive_time_ms is not None:
+      options.append(('grpc.keepalive_time_ms', self.keepalive_time_ms))
+    if self.keepalive_timeout_ms is not None:
+      options.append(('grpc.keepalive_timeout_ms', self.keepalive_timeout_ms))
+    if self.max_receive_message_length is not None:
+      options.append(('grpc.max_receive_message_length', self.max_receive_message_length))
+    if self.max_send_message_length is not None:
+      options.append(('grpc.max_send_message_length', self.max_send_message_length))
+    return options
+
+  def server_options(self):
+    options = self.channel_options()
+    if self.keepalive_time_ms is not None:
+      # accept client keepalive pings as frequent as our own
+      options.append(('grpc.http2.min_ping_interval_without_data_ms', self.keepalive_time_ms))
+    if self.so_reuseport is not None:
+      options.append(('grpc.so_reuseport', self.so_reuseport))
+    return options
+
+class ServerExecutor(futures.ThreadPoolExecutor):
+  """Thread pool that keeps track of queue depth and rejected RPCs."""
+
+  def __init__(self, max_workers):
+    super().__init__(max_workers=max_workers, thread_name_prefix='grpc-server')
+    self.max_workers = max_workers
+    self._lock = threading.Lock()
+    self.outstanding = 0
+    self.completed = 0
+    self.rejected = 0
+
+  def submit(self, fn, *args, **kwargs):
+    with self._lock:
+      self.outstanding += 1
+    future = super().submit(fn, *args, **kwargs)
+    future.add_done_callback(self._done)
+    return future
+
+  def reject(self):
+    with self._lock:
+      self.rejected += 1
+
+  def stats(self):
+    with self._lock:
+      return {
+        'active': min(self.outstanding, self.max_workers),
+        'queue_depth': max(0, self.outstanding - self.max_workers),
+        'completed': self.completed,
+        'rejected': self.rejected,
+      }
+
+  def _done(self, future):
+    with self._lock:
+      self.outstanding -= 1
+      self.completed += 1
+
+class _RejectionCounter(grpc.ServerInterceptor):
+  # gRPC runs interceptors on the polling thread right before it checks
+  # maximum_concurrent_rpcs and fails the call with RESOURCE_EXHAUSTED, so
+  # the same check here counts the calls that are about to be shed.
+  def __init__(self, executor, max_concurrent_rpcs):
+    self._executor = executor
+    self._max_concurrent_rpcs = max_concurrent_rpcs
+
+  def intercept_service(self, continuation, handler_call_details):
+    if self._executor.outstanding >= self._max_concurrent_rpcs:
+      self._executor.reject()
+    return continuation(handler_call_details)
+
+def _report_stats(logger, executor, interval):
+  while True:
+    time.sleep(interval)
+    logger.info("grpc server stats: {}".format(executor.stats()))
+    log_stats = getLogStats()
+    if log_stats:
+      # records still buffered, and those dropped because the buffer was full
+      logger.info("log handler stats: {}".format(log_stats))
+
+def create_server(logger, config=None):
+  """Returns a grpc.server configured from `config` (or the environment)."""
+  config = config or ServerConfig()
+  executor = ServerExecutor(config.max_workers)
+  interceptors = []
+  if config.max_concurrent_rpcs:
+    interceptors.append(_RejectionCounter(executor, config.max_concurrent_rpcs))
+  server = grpc.server(executor,
+                       interceptors=interceptors,
+                       options=config.server_options(),
+                       maximum_concurrent_rpcs=config.max_concurrent_rpcs)
+  logger.info("grpc server: max_workers={} max_concurrent_rpcs={}".format(
+    config.max_workers, config.max_concurrent_rpcs))
+  if config.stats_interval > 0:
+    thread = threading.Thread(target=_report_stats, args=(logger, executor, config.stats_interval),
+                              name='grpc-server-stats', daemon=True)
+    thread.start()
+  return server
+
+def create_aio_server(logger, config=None):
+  """Returns a grpc.aio.server configured from `config` (or the environment).
+
+  There is no thread pool in asyncio mode, so only the concurrency limit and
+  the channel options apply.
+  """
+  config = config or ServerConfig()
+  logger.info("grpc aio server: max_concurrent_rpcs={}".format(config.max_concurrent_rpcs))
+  return grpc.aio.server(options=config.server_options(),
+                         maximum_concurrent_rpcs=config.max_concurrent_rpcs)
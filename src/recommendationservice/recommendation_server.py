@@ -14,11 +14,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import hashlib
+import itertools
 import os
+from collections import OrderedDict
 import random
+import threading
 import time
 import traceback
-from concurrent import futures
 
 import googleclouddebugger
 import googlecloudprofiler
@@ -36,7 +40,11 @@ from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 
-from logger import getJSONLogger
+from grpc_server import ServerConfig, create_aio_server, create_server
+from prefork import Supervisor
+from recommender import CategoryIndex, ProductIndex, request_rng
+from request_log import RequestLog
+from logger import getJSONLogger, getLogStats
 logger = getJSONLogger('recommendationservice-server')
 
 def initStackdriverProfiling():
@@ -64,25 +72,396 @@ def initStackdriverProfiling():
         logger.warning("Could not initialize Stackdriver Profiler after retrying, giving up")
   return
 
+class CatalogSnapshot(object):
+    def __init__(self, version, products, previous=None):
+        self.version = version
+        self.products = products
+        # unlike version, the digest is the same in every process that sees
+        # the same catalog
+        self.digest = hashlib.blake2b(
+            b''.join(x.SerializeToString(deterministic=True) for x in products),
+            digest_size=16).digest()
+        self.index = ProductIndex(x.id for x in products)
+        self.categories = CategoryIndex.build(
+            products, previous.categories if previous is not None else None)
+        self.fetched_at = time.monotonic()
+
+class CatalogCache(object):
+    """In-memory snapshot of the product catalog.
+
+    The snapshot is refreshed on a background thread every `ttl` seconds.
+    Readers always get the current snapshot without waiting on the catalog
+    service, except on a cold start. If the snapshot is older than `ttl`
+    plus a grace period for the refresh thread to do its work (e.g. the
+    catalog service was unreachable), the stale snapshot is served while a
+    refresh is triggered in the background. A `ttl` of 0 disables caching
+    and fetches the catalog on every call, without the single-flight lock.
+    """
+
+    def __init__(self, stub, ttl):
+        self._stub = stub
+        self._ttl = ttl
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._revalidating = False
+        # snapshots are stale after `ttl`, or once the refresh thread is
+        # running, after `ttl` and the grace period it has to replace them
+        self._max_age = ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def start(self):
+        if self._ttl <= 0:
+            return
+        self._max_age = self._ttl * 2
+        thread = threading.Thread(target=self._refresh_loop, name='catalog-refresh', daemon=True)
+        thread.start()
+
+    def get(self):
+        snapshot = self._cached()
+        if snapshot is None and self._ttl <= 0:
+            return self._refresh()
+        if snapshot is None:
+            # single-flight: concurrent misses wait for one fetch instead of
+            # each issuing their own ListProducts call
+            with self._refresh_lock:
+                # a snapshot fetched by whoever held the lock before us is good enough
+                return self._snapshot or self._refresh()
+        return snapshot
+
+    def refresh(self):
+        with self._refresh_lock:
+            return self._refresh()
+
+    def stats(self):
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'version': snapshot.version if snapshot else 0,
+                'products': len(snapshot.index) if snapshot else 0,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+            }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _cached(self):
+        # returns the snapshot to serve, or None on a miss
+        snapshot = self._snapshot
+        if snapshot is None or self._ttl <= 0:
+            self._count('misses')
+            return None
+        if time.monotonic() - snapshot.fetched_at > self._max_age:
+            self._count('stale_hits')
+            self._revalidate()
+        else:
+            self._count('hits')
+        return snapshot
+
+    def _refresh(self):
+        return self._store(self._stub.ListProducts(demo_pb2.Empty()))
+
+    def _refresh_if_stale(self):
+        # the snapshot may have been refreshed while we waited for the lock
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.fetched_at < self._ttl:
+                return snapshot
+            return self._refresh()
+
+    def _next_refresh(self):
+        # seconds until the snapshot is `ttl` old, or `ttl` if the last
+        # refresh failed
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._ttl
+        delay = snapshot.fetched_at + self._ttl - time.monotonic()
+        return delay if delay > 0 else self._ttl
+
+    def _store(self, cat_response):
+        current = self._snapshot
+        if current is not None and current.products == cat_response.products:
+            current.fetched_at = time.monotonic()
+            return current
+        version = current.version + 1 if current is not None else 1
+        snapshot = CatalogSnapshot(version, cat_response.products, current)
+        with self._lock:
+            self._snapshot = snapshot
+        logger.info("product catalog snapshot updated: {}".format(self.stats()))
+        return snapshot
+
+    def _revalidate(self):
+        with self._lock:
+            if self._revalidating:
+                return
+            self._revalidating = True
+        thread = threading.Thread(target=self._revalidate_once, name='catalog-revalidate', daemon=True)
+        thread.start()
+
+    def _revalidate_once(self):
+        try:
+            self._refresh_if_stale()
+        except Exception:
+            logger.warning("Could not revalidate product catalog: {}".format(traceback.format_exc()))
+        finally:
+            with self._lock:
+                self._revalidating = False
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self._refresh_if_stale()
+            except Exception:
+                logger.warning("Could not refresh product catalog, serving stale snapshot: {}".format(traceback.format_exc()))
+            time.sleep(self._next_refresh())
+
+class AsyncCatalogCache(CatalogCache):
+    """CatalogCache for the asyncio server, backed by a grpc.aio stub.
+
+    Refreshes run as tasks on the event loop instead of threads, so `get`,
+    `refresh` and `start` must be called from within the running loop.
+    """
+
+    def start(self):
+        self._refresh_lock = asyncio.Lock()
+        self._tasks = set()
+        if self._ttl > 0:
+            self._max_age = self._ttl * 2
+            self._spawn(self._refresh_loop())
+
+    async def get(self):
+        snapshot = self._cached()
+        if snapshot is None and self._ttl <= 0:
+            return await self._refresh()
+        if snapshot is None:
+            async with self._refresh_lock:
+                return self._snapshot or await self._refresh()
+        return snapshot
+
+    async def refresh(self):
+        async with self._refresh_lock:
+            return await self._refresh()
+
+    async def _refresh(self):
+        return self._store(await self._stub.ListProducts(demo_pb2.Empty()))
+
+    async def _refresh_if_stale(self):
+        async with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.fetched_at < self._ttl:
+                return snapshot
+            return await self._refresh()
+
+    def _spawn(self, coro):
+        # keep a reference so pending tasks are not garbage collected
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _revalidate(self):
+        if self._revalidating:
+            return
+        self._revalidating = True
+        self._spawn(self._revalidate_once())
+
+    async def _revalidate_once(self):
+        try:
+            await self._refresh_if_stale()
+        except Exception:
+            logger.warning("Could not revalidate product catalog: {}".format(traceback.format_exc()))
+        finally:
+            self._revalidating = False
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self._refresh_if_stale()
+            except Exception:
+                logger.warning("Could not refresh product catalog, serving stale snapshot: {}".format(traceback.format_exc()))
+            await asyncio.sleep(self._next_refresh())
+
+class ResponseCache(object):
+    """Bounded LRU cache of recommendations keyed by request fingerprint.
+
+    Entries expire after `ttl` seconds and the whole cache is dropped when
+    a newer catalog snapshot version shows up. Requests that still hold an
+    older snapshot neither read nor fill the cache.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, version, key):
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version, key, value):
+        with self._lock:
+            self._sync_version(version)
+            if version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _sync_version(self, version):
+        if version > self._version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+PAGE_SIZE_ERROR = "page_size must not be negative"
+
 class RecommendationService(demo_pb2_grpc.RecommendationServiceServicer):
+    # requests with longer product lists are rarely repeated and would make
+    # cache keys arbitrarily large, so they are not cached
+    max_cached_product_ids = 64
+
+    def __init__(self, catalog, engine='category', seed_window=0, response_cache=None, request_log=None):
+        self.catalog = catalog
+        self.engine = engine
+        self.seed_window = seed_window
+        self.response_cache = response_cache
+        self.request_log = request_log or RequestLog(logger)
+
     def ListRecommendations(self, request, context):
-        max_responses = 5
-        # fetch list of products from product catalog stub
-        cat_response = product_catalog_stub.ListProducts(demo_pb2.Empty())
-        product_ids = [x.id for x in cat_response.products]
-        filtered_products = list(set(product_ids)-set(request.product_ids))
-        num_products = len(filtered_products)
-        num_return = min(max_responses, num_products)
-        # sample list of indicies to return
-        indices = random.sample(range(num_products), num_return)
-        # fetch product ids from indices
-        prod_list = [filtered_products[i] for i in indices]
-        logger.info("[Recv ListRecommendations] product_ids={}".format(prod_list))
+        with self.request_log.request('ListRecommendations') as entry:
+            return self._recommend(self.catalog.get(), request, entry)
+
+    def ListRecommendationsBatch(self, request, context):
+        with self.request_log.request('ListRecommendationsBatch') as entry:
+            return self._recommend_batch(self.catalog.get(), request, entry)
+
+    def StreamRecommendations(self, request, context):
+        with self.request_log.request('StreamRecommendations') as entry:
+            if request.page_size < 0:
+                entry.set_status(grpc.StatusCode.INVALID_ARGUMENT)
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, PAGE_SIZE_ERROR)
+            # pages are generated lazily as gRPC flow control lets us write them
+            for response in self._pages(self.catalog.get(), request, entry):
+                # the client's reading is not our latency
+                entry.pause()
+                yield response
+                entry.resume()
+
+    def _recommend(self, snapshot, request, entry):
+        prod_list = self._pick(snapshot, request)
+        entry.set("[Recv ListRecommendations] product_ids=%s", prod_list)
         # build and return response
         response = demo_pb2.ListRecommendationsResponse()
         response.product_ids.extend(prod_list)
         return response
 
+    def _recommend_batch(self, snapshot, request, entry):
+        # every request in the batch is served from the same catalog snapshot
+        response = demo_pb2.ListRecommendationsBatchResponse()
+        for item in request.requests:
+            response.responses.add().product_ids.extend(self._pick(snapshot, item))
+        entry.set("[Recv ListRecommendationsBatch] requests=%d", len(request.requests))
+        return response
+
+    def _pages(self, snapshot, request, entry):
+        max_page_size = 100
+        page_size = min(request.page_size or 5, max_page_size)
+        # one shuffled permutation per stream, so pages never repeat products
+        rng = self._rng(snapshot, request, self._time_bucket())
+        product_ids = snapshot.index.shuffled(request.product_ids, rng)
+        num_pages = 0
+        while True:
+            entry.set("[Recv StreamRecommendations] pages=%d", num_pages)
+            prod_list = list(itertools.islice(product_ids, page_size))
+            if not prod_list:
+                return
+            num_pages += 1
+            response = demo_pb2.ListRecommendationsResponse()
+            response.product_ids.extend(prod_list)
+            yield response
+
+    def _pick(self, snapshot, request):
+        # read the clock once, so a request that crosses into the next bucket
+        # is not cached under the bucket it started in
+        time_bucket = self._time_bucket()
+        key = self._fingerprint(request, time_bucket)
+        if key is None:
+            return self._pick_uncached(snapshot, request, time_bucket)
+        prod_list = self.response_cache.get(snapshot.version, key)
+        if prod_list is None:
+            prod_list = self._pick_uncached(snapshot, request, time_bucket)
+            self.response_cache.put(snapshot.version, key, prod_list)
+        return prod_list
+
+    def _fingerprint(self, request, time_bucket):
+        if self.response_cache is None or len(request.product_ids) > self.max_cached_product_ids:
+            return None
+        product_ids = tuple(sorted(set(request.product_ids)))
+        if self.seed_window <= 0:
+            # unseeded recommendations don't depend on the user
+            return product_ids
+        return (request.user_id, product_ids, time_bucket)
+
+    def _pick_uncached(self, snapshot, request, time_bucket):
+        max_responses = 5
+        rng = self._rng(snapshot, request, time_bucket)
+        # pick product ids from the cached catalog snapshot
+        if self.engine == 'category':
+            return snapshot.categories.recommend(snapshot.index, max_responses, request.product_ids, rng)
+        return snapshot.index.sample(max_responses, request.product_ids, rng)
+
+    def _rng(self, snapshot, request, time_bucket):
+        if time_bucket is None:
+            return random
+        return request_rng(request.user_id, request.product_ids, snapshot.digest, time_bucket)
+
+    def _time_bucket(self):
+        # seeded recommendations are deterministic within each seed_window;
+        # None if they are not seeded
+        if self.seed_window <= 0:
+            return None
+        return int(time.time() // self.seed_window)
+
     def Check(self, request, context):
         return health_pb2.HealthCheckResponse(
             status=health_pb2.HealthCheckResponse.SERVING)
@@ -91,10 +470,107 @@ class RecommendationService(demo_pb2_grpc.RecommendationServiceServicer):
         return health_pb2.HealthCheckResponse(
             status=health_pb2.HealthCheckResponse.UNIMPLEMENTED)
 
+class AsyncRecommendationService(RecommendationService):
+    async def ListRecommendations(self, request, context):
+        with self.request_log.request('ListRecommendations') as entry:
+            return self._recommend(await self.catalog.get(), request, entry)
 
-if __name__ == "__main__":
-    logger.info("initializing recommendationservice")
+    async def ListRecommendationsBatch(self, request, context):
+        with self.request_log.request('ListRecommendationsBatch') as entry:
+            return self._recommend_batch(await self.catalog.get(), request, entry)
+
+    async def StreamRecommendations(self, request, context):
+        with self.request_log.request('StreamRecommendations') as entry:
+            if request.page_size < 0:
+                entry.set_status(grpc.StatusCode.INVALID_ARGUMENT)
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, PAGE_SIZE_ERROR)
+            for response in self._pages(await self.catalog.get(), request, entry):
+                entry.pause()
+                yield response
+                entry.resume()
+
+    async def Check(self, request, context):
+        return super().Check(request, context)
+
+    async def Watch(self, request, context):
+        return super().Watch(request, context)
+
+def report_stats(catalog, service):
+    # STATS_INTERVAL>0 logs the catalog, response cache and logging counters
+    interval = float(os.environ.get('STATS_INTERVAL', "0"))
+    if interval <= 0:
+        return
+    def report():
+        while True:
+            time.sleep(interval)
+            logger.info("catalog cache stats: {}".format(catalog.stats()))
+            if service.response_cache is not None:
+                logger.info("response cache stats: {}".format(service.response_cache.stats()))
+            logger.info("request log stats: {}".format(service.request_log.stats()))
+            log_stats = getLogStats()
+            if log_stats:
+                logger.info("log handler stats: {}".format(log_stats))
+    thread = threading.Thread(target=report, name='stats', daemon=True)
+    thread.start()
+
+def serve(port, catalog_addr, catalog_ttl, service_args, health_address=None):
+    config = ServerConfig()
+    channel = grpc.insecure_channel(catalog_addr, options=config.channel_options())
+    product_catalog_stub = demo_pb2_grpc.ProductCatalogServiceStub(channel)
+    catalog = CatalogCache(product_catalog_stub, catalog_ttl)
+    catalog.start()
+
+    # create gRPC server
+    server = create_server(logger, config)
+
+    # add class to gRPC server
+    service = RecommendationService(catalog, **service_args)
+    report_stats(catalog, service)
+    demo_pb2_grpc.add_RecommendationServiceServicer_to_server(service, server)
+    health_pb2_grpc.add_HealthServicer_to_server(service, server)
+
+    # start server
+    logger.info("listening on port: " + port)
+    server.add_insecure_port('[::]:'+port)
+    if health_address:
+        server.add_insecure_port(health_address)
+    server.start()
+
+    # keep alive
+    try:
+         while True:
+            time.sleep(10000)
+    except KeyboardInterrupt:
+            server.stop(0)
+
+# note: GrpcInstrumentorServer only patches grpc.server, so requests served
+# in asyncio mode are not traced
+async def serve_asyncio(port, catalog_addr, catalog_ttl, service_args, health_address=None):
+    config = ServerConfig()
+    channel = grpc.aio.insecure_channel(catalog_addr, options=config.channel_options())
+    product_catalog_stub = demo_pb2_grpc.ProductCatalogServiceStub(channel)
+    catalog = AsyncCatalogCache(product_catalog_stub, catalog_ttl)
+    catalog.start()
 
+    server = create_aio_server(logger, config)
+    service = AsyncRecommendationService(catalog, **service_args)
+    report_stats(catalog, service)
+    demo_pb2_grpc.add_RecommendationServiceServicer_to_server(service, server)
+    health_pb2_grpc.add_HealthServicer_to_server(service, server)
+
+    logger.info("listening on port: " + port)
+    server.add_insecure_port('[::]:'+port)
+    if health_address:
+        server.add_insecure_port(health_address)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+        await channel.close()
+
+
+def main(health_address=None):
     try:
       if "DISABLE_PROFILER" in os.environ:
         raise KeyError()
@@ -145,25 +621,58 @@ if __name__ == "__main__":
     if catalog_addr == "":
         raise Exception('PRODUCT_CATALOG_SERVICE_ADDR environment variable not set')
     logger.info("product catalog address: " + catalog_addr)
-    channel = grpc.insecure_channel(catalog_addr)
-    product_catalog_stub = demo_pb2_grpc.ProductCatalogServiceStub(channel)
+    catalog_ttl = float(os.environ.get('CATALOG_CACHE_TTL', "30"))
+    logger.info("product catalog cache ttl: {}s".format(catalog_ttl))
+    engine = os.environ.get('RECOMMENDATION_ENGINE', "category")
+    if engine not in ('category', 'random'):
+        raise Exception('RECOMMENDATION_ENGINE must be one of "category" or "random"')
+    logger.info("recommendation engine: " + engine)
+    # RECOMMENDATION_SEED_WINDOW>0 makes identical requests get identical
+    # recommendations for that many seconds, so they can be cached
+    seed_window = float(os.environ.get('RECOMMENDATION_SEED_WINDOW', "0"))
+    logger.info("recommendation seed window: {}s".format(seed_window))
+    service_args = {'engine': engine, 'seed_window': seed_window}
+    # RESPONSE_CACHE_SIZE>0 caches that many responses per process for
+    # RESPONSE_CACHE_TTL seconds; unless RECOMMENDATION_SEED_WINDOW is set,
+    # identical requests then get identical answers for the ttl
+    response_cache_size = int(os.environ.get('RESPONSE_CACHE_SIZE', "0"))
+    if response_cache_size > 0:
+        response_cache_ttl = float(os.environ.get('RESPONSE_CACHE_TTL', "10"))
+        logger.info("response cache: {} entries, ttl {}s".format(response_cache_size, response_cache_ttl))
+        service_args['response_cache'] = ResponseCache(response_cache_size, response_cache_ttl)
+    # requests are logged with probability REQUEST_LOG_SAMPLE_RATE, and at
+    # most REQUEST_LOG_RATE per second and RPC (0 for no limit); failed
+    # requests and those slower than REQUEST_LOG_SLOW_MS are always logged
+    request_log_rate = float(os.environ.get('REQUEST_LOG_RATE', "10"))
+    service_args['request_log'] = RequestLog(
+        logger,
+        sample_rate=float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', "1")),
+        rate=request_log_rate,
+        slow=float(os.environ.get('REQUEST_LOG_SLOW_MS', "500")) / 1000)
+    logger.info("request log: sample rate {}, {}/s per RPC".format(
+        os.environ.get('REQUEST_LOG_SAMPLE_RATE', "1"), request_log_rate))
 
-    # create gRPC server
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # SERVER_MODE=asyncio serves with grpc.aio instead of a thread pool
+    server_mode = os.environ.get('SERVER_MODE', "sync")
+    logger.info("server mode: " + server_mode)
+    if server_mode == "sync":
+        serve(port, catalog_addr, catalog_ttl, service_args, health_address)
+    elif server_mode == "asyncio":
+        try:
+            asyncio.run(serve_asyncio(port, catalog_addr, catalog_ttl, service_args, health_address))
+        except KeyboardInterrupt:
+            pass
+    else:
+        raise Exception('SERVER_MODE must be one of "sync" or "asyncio"')
 
-    # add class to gRPC server
-    service = RecommendationService()
-    demo_pb2_grpc.add_RecommendationServiceServicer_to_server(service, server)
-    health_pb2_grpc.add_HealthServicer_to_server(service, server)
 
-    # start server
-    logger.info("listening on port: " + port)
-    server.add_insecure_port('[::]:'+port)
-    server.start()
+if __name__ == "__main__":
+    logger.info("initializing recommendationservice")
 
-    # keep alive
-    try:
-         while True:
-            time.sleep(10000)
-    except KeyboardInterrupt:
-            server.stop(0)
+    # SERVER_PROCESSES>1 forks that many servers sharing PORT, since a single
+    # process can only use one core for Python work
+    server_processes = int(os.environ.get('SERVER_PROCESSES', "1"))
+    if server_processes > 1:
+        Supervisor(logger, 'recommendationservice', server_processes).run(main)
+    else:
+        main()
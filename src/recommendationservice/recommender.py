@@ -0,0 +1,202 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import itertools
+import random
+from collections import Counter
+
+# above this fraction of the catalog being excluded, rejection sampling
+# wastes too many draws and we fall back to filtering the whole catalog
+MAX_EXCLUDED_FRACTION = 0.5
+
+# products CategoryIndex draws from the requested categories as candidates,
+# which bounds the cost of ranking them by shared categories
+MAX_CANDIDATES = 64
+
+def request_rng(user_id, product_ids, catalog_digest, time_bucket):
+    """Returns a random.Random seeded from the request and the catalog.
+
+    Identical requests against the same catalog in the same time bucket get
+    the same recommendations, in every process, so responses can be cached.
+    """
+    seed = hashlib.blake2b(digest_size=8)
+    seed.update(user_id.encode('utf-8'))
+    for product_id in sorted(set(product_ids)):
+        seed.update(b'\0')
+        seed.update(product_id.encode('utf-8'))
+    seed.update(b'\0')
+    seed.update(catalog_digest)
+    seed.update(str(time_bucket).encode('ascii'))
+    return random.Random(seed.digest())
+
+class ProductIndex(object):
+    """Dense array of unique product ids plus an id -> position lookup.
+
+    Built once per catalog snapshot so that recommendations can be drawn
+    without touching the whole catalog on every request.
+    """
+
+    def __init__(self, product_ids):
+        self.product_ids = list(dict.fromkeys(product_ids))
+        self.positions = {product_id: i for i, product_id in enumerate(self.product_ids)}
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def sample(self, k, excluded=(), rng=random):
+        """Returns up to k distinct product ids that are not in `excluded`."""
+        num_products = len(self.product_ids)
+        excluded_positions = {self.positions[x] for x in excluded if x in self.positions}
+        num_return = min(k, num_products - len(excluded_positions))
+        if num_return <= 0:
+            return []
+        if len(excluded_positions) > num_products * MAX_EXCLUDED_FRACTION:
+            return self._sample_filtered(num_return, excluded_positions, rng)
+        # rejection sampling: O(k + |excluded|) expected, since at most half
+        # of the draws can land on an excluded position
+        chosen = set()
+        prod_list = []
+        while len(prod_list) < num_return:
+            i = rng.randrange(num_products)
+            if i in excluded_positions or i in chosen:
+                continue
+            chosen.add(i)
+            prod_list.append(self.product_ids[i])
+        return prod_list
+
+    def shuffled(self, excluded=(), rng=random):
+        """Yields every product id not in `excluded` once, in random order.
+
+        The permutation is produced lazily by a sparse Fisher-Yates shuffle,
+        so taking m ids costs O(m + |excluded|) rather than O(catalog).
+        """
+        num_products = len(self.product_ids)
+        excluded_positions = {self.positions[x] for x in excluded if x in self.positions}
+        swapped = {}
+        for i in range(num_products):
+            j = rng.randrange(i, num_products)
+            position = swapped.get(j, j)
+            swapped[j] = swapped.pop(i, i)
+            if position not in excluded_positions:
+                yield self.product_ids[position]
+
+    def _sample_filtered(self, num_return, excluded_positions, rng):
+        filtered_products = [x for i, x in enumerate(self.product_ids) if i not in excluded_positions]
+        return rng.sample(filtered_products, num_return)
+
+class CategoryIndex(object):
+    """Inverted index from category to the ids of the products in it.
+
+    Recommendations are ranked by how many categories a candidate shares
+    with the products in the request; remaining slots are filled randomly.
+    Candidates are a random window of each requested category's products,
+    MAX_CANDIDATES of them in all, so a request costs the same however large
+    its categories are.
+    """
+
+    def __init__(self, product_categories, products_by_category):
+        self.product_categories = product_categories
+        # category -> ids of its products, sorted so that a seeded rng draws
+        # the same candidates in every process
+        self.products_by_category = products_by_category
+
+    @classmethod
+    def build(cls, products, previous=None):
+        """Builds the index for `products`, reusing `previous` where possible.
+
+        Only the posting lists of categories that gained or lost products
+        since `previous` are rebuilt; every other one is shared with the old
+        index, which stays untouched for readers still holding it.
+        """
+        previous_categories = previous.product_categories if previous is not None else {}
+        product_categories = {}
+        # product id -> its categories in `previous`, for every product whose
+        # categories changed
+        changed = {}
+        for product in products:
+            categories = previous_categories.get(product.id)
+            if (categories is None or len(categories) != len(product.categories)
+                    or not categories.issuperset(product.categories)):
+                categories = frozenset(product.categories)
+                old = previous_categories.get(product.id, frozenset())
+                if categories != old:
+                    changed[product.id] = old
+            product_categories[product.id] = categories
+        # removed products
+        for product_id in previous_categories.keys() - product_categories.keys():
+            changed[product_id] = previous_categories[product_id]
+        if previous is not None and not changed:
+            return cls(product_categories, previous.products_by_category)
+
+        products_by_category = dict(previous.products_by_category) if previous is not None else {}
+        postings = {}
+        for product_id, old in changed.items():
+            new = product_categories.get(product_id, frozenset())
+            for category in old ^ new:
+                if category not in postings:
+                    postings[category] = set(products_by_category.get(category, ()))
+                if category in new:
+                    postings[category].add(product_id)
+                else:
+                    postings[category].discard(product_id)
+        for category, product_ids in postings.items():
+            if product_ids:
+                products_by_category[category] = tuple(sorted(product_ids))
+            else:
+                products_by_category.pop(category, None)
+        return cls(product_categories, products_by_category)
+
+    def recommend(self, index, k, requested=(), rng=random):
+        """Returns up to k product ids related to `requested`, then random ones."""
+        if k <= 0:
+            return []
+        requested = set(requested)
+        # how many of the requested products are in each category
+        weights = Counter(itertools.chain.from_iterable(
+            self.product_categories.get(product_id, ()) for product_id in requested))
+        per_category = max(k, MAX_CANDIDATES // len(weights)) if weights else 0
+        candidates = set()
+        # in a fixed order, so that a seeded rng draws the same candidates.
+        # A window at a random offset gives every product of the category
+        # the same chance with a single draw.
+        for category in sorted(weights):
+            product_ids = self.products_by_category[category]
+            if len(product_ids) > per_category:
+                start = rng.randrange(len(product_ids))
+                end = start + per_category
+                candidates.update(product_ids[start:end], product_ids[:end - len(product_ids)]
+                                  if end > len(product_ids) else ())
+            else:
+                candidates.update(product_ids)
+        candidates -= requested
+        # a candidate scores one point per requested product and category
+        # they share
+        scores = Counter({x: sum(weights[category] for category in self.product_categories[x])
+                          for x in candidates})
+        ranked = scores.most_common()
+        # everything above the cut-off score is in; ties at the cut-off are
+        # broken with rng. Both are ordered by id first so that a seeded rng
+        # gives the same answer regardless of set iteration order.
+        cutoff = ranked[k - 1][1] if len(ranked) > k else 0
+        prod_list = sorted((x for x, score in ranked[:k] if score > cutoff),
+                           key=lambda x: (-scores[x], x))
+        if len(prod_list) < k and cutoff > 0:
+            tied = sorted(x for x, score in ranked if score == cutoff)
+            prod_list += rng.sample(tied, k - len(prod_list))
+        if len(prod_list) < k:
+            prod_list += index.sample(k - len(prod_list), requested.union(prod_list), rng)
+        return prod_list
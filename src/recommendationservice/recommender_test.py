@@ -0,0 +1,70 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from collections import namedtuple
+
+from recommender import CategoryIndex, ProductIndex
+
+# the fields of demo_pb2.Product that the index reads
+Product = namedtuple('Product', 'id categories')
+
+CATEGORIES = ['shoes', 'hats', 'bags', 'socks', 'belts']
+
+def random_product(rng, product_id):
+    return Product(product_id, rng.sample(CATEGORIES, rng.randrange(len(CATEGORIES) + 1)))
+
+def edit(rng, catalog):
+    """Returns `catalog` with a few products added, removed and recategorized."""
+    catalog = dict(catalog)
+    for _ in range(rng.randrange(1, 4)):
+        action = rng.choice(['add', 'remove', 'recategorize'])
+        if action == 'add' or not catalog:
+            product_id = 'p{}'.format(rng.randrange(1000))
+            catalog[product_id] = random_product(rng, product_id)
+        elif action == 'remove':
+            del catalog[rng.choice(sorted(catalog))]
+        else:
+            product_id = rng.choice(sorted(catalog))
+            catalog[product_id] = random_product(rng, product_id)
+    return catalog
+
+def assert_same_index(actual, expected):
+    assert actual.product_categories == expected.product_categories
+    assert actual.products_by_category == expected.products_by_category
+
+def test_removing_a_product_while_adding_an_uncategorized_one():
+    previous = CategoryIndex.build([Product('a', ['shoes']), Product('b', ['shoes'])])
+    products = [Product('a', ['shoes']), Product('c', [])]
+    index = CategoryIndex.build(products, previous)
+    assert index.products_by_category == {'shoes': ('a',)}
+    assert index.recommend(ProductIndex(['a', 'c']), 5, ['a']) == ['c']
+
+def test_incremental_builds_match_full_builds():
+    rng = random.Random(0)
+    catalog = {}
+    index = CategoryIndex.build([])
+    for _ in range(3000):
+        catalog = edit(rng, catalog)
+        products = list(catalog.values())
+        index = CategoryIndex.build(products, index)
+        assert_same_index(index, CategoryIndex.build(products))
+
+def test_unchanged_catalogs_share_posting_lists():
+    products = [Product('a', ['shoes']), Product('b', ['shoes', 'hats'])]
+    previous = CategoryIndex.build(products)
+    index = CategoryIndex.build([Product('b', ['hats', 'shoes']), Product('a', ['shoes'])], previous)
+    assert index.products_by_category is previous.products_by_category
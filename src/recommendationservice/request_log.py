@@ -0,0 +1,169 @@
+#!/usr/bin/python
+#
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+class RequestLog(object):
+    """One log record per request, sampled and rate limited.
+
+    A `sample_rate` share of requests is picked, and of those at most `rate`
+    per second and key (e.g. the RPC) are logged, with bursts of up to
+    `burst`; a rate of 0 means no limit. Requests that failed or took longer
+    than `slow` seconds are always logged: failures with the gRPC status the
+    handler gave them as warnings, other exceptions as errors with their
+    traceback. Messages take %-style arguments, which are only formatted for
+    records that are logged.
+
+    Records carry the key, the duration and how many records of the key
+    were suppressed since the last one as `request`, `duration_ms` and
+    `suppressed`.
+    """
+
+    def __init__(self, logger, sample_rate=1.0, rate=0, burst=None, slow=0.5, max_keys=1000):
+        self._logger = logger
+        self._sample_rate = sample_rate
+        self._rate = rate
+        self._burst = burst or max(rate, 1)
+        self._slow = slow
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [tokens, last refill, suppressed since the last record]
+        self._buckets = {}
+        self.logged = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def request(self, key):
+        """Returns a context manager that logs the request it wraps: the
+        message given to its set(), or the exception it raised. For streams,
+        its pause() and resume() stop the clock while the client reads."""
+        return _Request(self, key)
+
+    def log(self, key, duration, msg, *args, error=None, status=None):
+        """Logs `msg % args` for a request that took `duration` seconds, or
+        that it failed with `error` and `status` (e.g. a grpc.StatusCode),
+        unless it is sampled out or over the rate."""
+        if error is not None and status is not None:
+            self._emit(logging.WARNING, key, duration, "[{}] failed with {}: %r".format(
+                key, getattr(status, 'name', status)), (error,))
+        elif error is not None:
+            self._emit(logging.ERROR, key, duration, "[{}] failed with UNKNOWN: %r".format(key), (error,),
+                       (type(error), error, error.__traceback__))
+        elif duration >= self._slow:
+            self._emit(logging.WARNING, key, duration, msg, args)
+        elif self._logger.isEnabledFor(logging.INFO) and self._admit(key):
+            self._emit(logging.INFO, key, duration, msg, args)
+
+    def stats(self):
+        with self._lock:
+            return {'logged': self.logged, 'sampled_out': self.sampled_out,
+                    'rate_limited': self.rate_limited}
+
+    def _admit(self, key):
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            with self._lock:
+                self.sampled_out += 1
+                self._suppress(key)
+            return False
+        if self._rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._new_bucket(key, now)
+            bucket[0] = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.rate_limited += 1
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            return True
+
+    def _suppress(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._new_bucket(key, time.monotonic())
+        bucket[2] += 1
+
+    def _new_bucket(self, key, now):
+        if len(self._buckets) >= self._max_keys:
+            self._buckets.clear()
+        bucket = self._buckets[key] = [self._burst, now, 0]
+        return bucket
+
+    def _emit(self, level, key, duration, msg, args, exc_info=None):
+        with self._lock:
+            self.logged += 1
+            bucket = self._buckets.get(key)
+            suppressed = 0
+            if bucket is not None:
+                suppressed, bucket[2] = bucket[2], 0
+        self._logger.log(level, msg, *args, exc_info=exc_info, extra={
+            'request': key,
+            'duration_ms': round(duration * 1000, 3),
+            'suppressed': suppressed,
+        })
+
+class _Request(object):
+    __slots__ = ('_log', '_key', '_start', '_paused', '_idle', '_msg', '_args', '_status')
+
+    def __init__(self, log, key):
+        self._log = log
+        self._key = key
+        self._paused = None
+        self._idle = 0
+        self._msg = None
+        self._args = ()
+        self._status = None
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        return self
+
+    def set(self, msg, *args):
+        self._msg = msg
+        self._args = args
+
+    def set_status(self, status):
+        """Sets the status an exception raised next fails the request with,
+        e.g. before context.abort()."""
+        self._status = status
+
+    def pause(self):
+        self._paused = time.monotonic()
+
+    def resume(self):
+        self._idle += time.monotonic() - self._paused
+        self._paused = None
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._paused is not None:
+            self.resume()
+        duration = time.monotonic() - self._start - self._idle
+        if isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+            # the client cancelled or went away
+            self._log.log(self._key, duration, None, error=exc, status='CANCELLED')
+        elif exc is not None:
+            self._log.log(self._key, duration, None, error=exc, status=self._status)
+        elif self._msg is not None:
+            self._log.log(self._key, duration, self._msg, *self._args)
+        return False